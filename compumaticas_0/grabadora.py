@@ -0,0 +1,577 @@
+# Titulo: Grabando los dibujos de turtle
+# Autor: Jorge Martínez Garrido
+#
+# Funciones como `dibujar_anillo` o `dibujar_estrella` dan a turtle una orden
+# tras otra: mover el lápiz, cambiar el color, trazar un círculo... Cada vez
+# que queremos volver a dibujar la escena, aunque sea a otro tamaño, tenemos
+# que repetir todas esas órdenes en directo.
+#
+# En este módulo grabamos las órdenes en una lista de dibujo. La lista se puede
+# reproducir después en turtle de una sola vez, escalar o desplazar sin volver
+# a calcular nada, o exportar como una imagen SVG.
+
+# ## Atacando el problema
+#
+# Las funciones de dibujo llaman a `turtle.goto`, `turtle.circle`... a través
+# del módulo `turtle` que importan. Si durante un momento cambiamos ese módulo
+# por un objeto con las mismas funciones que, en lugar de dibujar, apunta cada
+# orden, tendremos la grabación sin modificar las funciones.
+#
+# Muchas órdenes no cambian nada: levantar un lápiz que ya está levantado o
+# volver a fijar el mismo color. La grabadora recuerda el estado del lápiz y
+# descarta esas órdenes. Las órdenes se guardan en dos matrices de NumPy: una
+# con el código de cada orden y otra con sus argumentos.
+
+from contextlib import contextmanager
+from math import cos, radians, sin
+
+import numpy as np
+
+from lienzo import COLORES
+
+# Códigos de las órdenes que se graban
+(
+    GOTO,
+    CIRCLE,
+    DOT,
+    PENCOLOR,
+    FILLCOLOR,
+    PENSIZE,
+    PENUP,
+    PENDOWN,
+    BEGIN_FILL,
+    END_FILL,
+    SETHEADING,
+) = range(11)
+
+# Órdenes de turtle que no afectan al dibujo y se ignoran al grabar
+IGNORADAS = ("hideturtle", "showturtle", "speed", "update", "mainloop", "done")
+
+
+def convertir_color_svg(color):
+    """
+    Devuelve un color de turtle en un formato que entiende SVG.
+
+    Parameters
+    ----------
+    color: str or tuple
+        Nombre del color o tupla (r, g, b) con valores entre 0 y 1.
+
+    Returns
+    -------
+    color_svg: str
+        El color en formato "#rrggbb" o su nombre si no es conocido.
+    """
+
+    if isinstance(color, str):
+        if color not in COLORES:
+            return color
+        color = COLORES[color]
+    return "#" + "".join(f"{round(255 * valor):02x}" for valor in color)
+
+
+class ListaDeDibujo:
+    """
+    Órdenes de turtle grabadas, guardadas en matrices.
+
+    Parameters
+    ----------
+    codigos: ~np.ndarray
+        Código de cada orden.
+    argumentos: ~np.ndarray
+        Matriz con los dos argumentos de cada orden. Las órdenes de color
+        guardan la posición del color en `paleta`.
+    paleta: list
+        Colores utilizados por las órdenes.
+    """
+
+    def __init__(self, codigos, argumentos, paleta):
+        self.codigos = np.asarray(codigos, dtype=np.uint8)
+        self.argumentos = np.asarray(argumentos, dtype=float).reshape(-1, 2)
+        self.paleta = list(paleta)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def ordenes(self):
+        """Recorre las órdenes como tuplas (código, argumentos)."""
+
+        for codigo, (a, b) in zip(self.codigos.tolist(), self.argumentos.tolist()):
+            if codigo in (DOT, PENCOLOR, FILLCOLOR):
+                b = self.paleta[int(b)]
+            yield codigo, a, b
+
+    def transformar(self, escala=1, desplazamiento=(0, 0)):
+        """
+        Devuelve la lista escalada respecto al origen y después desplazada.
+
+        Parameters
+        ----------
+        escala: float
+            Factor por el que se multiplican posiciones, radios y grosores.
+        desplazamiento: tuple
+            Desplazamiento (x, y) de todas las posiciones.
+
+        Returns
+        -------
+        lista: ListaDeDibujo
+            Una nueva lista con las órdenes transformadas.
+        """
+
+        argumentos = self.argumentos.copy()
+        es_goto = self.codigos == GOTO
+        argumentos[es_goto] = argumentos[es_goto] * escala + desplazamiento
+        for codigo in (CIRCLE, DOT, PENSIZE):
+            argumentos[self.codigos == codigo, 0] *= escala
+        return ListaDeDibujo(self.codigos, argumentos, self.paleta)
+
+    def reproducir(self, tortuga=None):
+        """
+        Dibuja todas las órdenes en turtle de una sola vez.
+
+        Parameters
+        ----------
+        tortuga: turtle.Turtle
+            Tortuga con la que dibujar. Por defecto, la del módulo `turtle`.
+        """
+
+        if tortuga is None:
+            import turtle as tortuga
+
+        # Desactivamos el refresco de pantalla hasta terminar
+        pantalla = tortuga.getscreen()
+        trazador = pantalla.tracer()
+        pantalla.tracer(0)
+
+        acciones = {
+            GOTO: lambda a, b: tortuga.goto(a, b),
+            CIRCLE: lambda a, b: tortuga.circle(a, b),
+            DOT: lambda a, b: tortuga.dot(a, b),
+            PENCOLOR: lambda a, b: tortuga.pencolor(b),
+            FILLCOLOR: lambda a, b: tortuga.fillcolor(b),
+            PENSIZE: lambda a, b: tortuga.pensize(a),
+            PENUP: lambda a, b: tortuga.penup(),
+            PENDOWN: lambda a, b: tortuga.pendown(),
+            BEGIN_FILL: lambda a, b: tortuga.begin_fill(),
+            END_FILL: lambda a, b: tortuga.end_fill(),
+            SETHEADING: lambda a, b: tortuga.setheading(a),
+        }
+        # El refresco se restaura aunque falle alguna orden
+        try:
+            for codigo, a, b in self.ordenes():
+                acciones[codigo](a, b)
+            pantalla.update()
+        finally:
+            pantalla.tracer(trazador)
+
+    def a_svg(self, ancho=640, alto=480, fondo=None):
+        """
+        Devuelve la escena como una imagen SVG con un elemento por figura.
+
+        Parameters
+        ----------
+        ancho: float
+            Ancho de la imagen, centrada en el origen como en turtle.
+        alto: float
+            Alto de la imagen, centrada en el origen como en turtle.
+        fondo: str or tuple
+            Color del fondo. Por defecto, transparente.
+
+        Returns
+        -------
+        svg: str
+            El contenido del fichero SVG.
+        """
+
+        elementos = []
+        if fondo is not None:
+            elementos.append(
+                f'<rect x="{-ancho / 2:g}" y="{-alto / 2:g}" width="{ancho:g}" '
+                f'height="{alto:g}" fill="{convertir_color_svg(fondo)}"/>'
+            )
+        elementos.extend(_figuras_svg(self.ordenes()))
+
+        cabecera = (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{ancho:g}" '
+            f'height="{alto:g}" viewBox="{-ancho / 2:g} {-alto / 2:g} {ancho:g} '
+            f'{alto:g}" stroke-linecap="round" stroke-linejoin="round">'
+        )
+        return "\n".join([cabecera, *elementos, "</svg>"]) + "\n"
+
+    def guardar_svg(self, fichero, ancho=640, alto=480, fondo=None):
+        """
+        Guarda la escena como un fichero SVG.
+
+        Parameters
+        ----------
+        fichero: str
+            Ruta del fichero SVG.
+        ancho: float
+            Ancho de la imagen.
+        alto: float
+            Alto de la imagen.
+        fondo: str or tuple
+            Color del fondo. Por defecto, transparente.
+        """
+
+        with open(fichero, "w") as salida:
+            salida.write(self.a_svg(ancho, alto, fondo))
+
+
+def _numero(valor):
+    """Devuelve un número en texto sin decimales innecesarios."""
+
+    return f"{round(float(valor), 6) + 0.0:g}"
+
+
+def _punto_svg(x, y):
+    """Devuelve un punto en coordenadas SVG, donde el eje y apunta abajo."""
+
+    return f"{_numero(x)},{_numero(-y)}"
+
+
+def _figuras_svg(ordenes):
+    """Convierte las órdenes grabadas en elementos SVG.
+
+    Los tramos rectos seguidos con el lápiz bajado forman una línea, los
+    rellenos forman un polígono y los círculos completos, un círculo."""
+
+    x, y, orientacion = 0.0, 0.0, 0.0
+    abajo, rellenando = True, False
+    color_lapiz, color_relleno, grosor = "black", "black", 1.0
+    linea, relleno, circulos_relleno = [], [], []
+
+    def trazo():
+        color = convertir_color_svg(color_lapiz)
+        return f'stroke="{color}" stroke-width="{_numero(grosor)}"'
+
+    def cerrar_linea():
+        if len(linea) > 1 and not rellenando:
+            puntos = " ".join(_punto_svg(*punto) for punto in linea)
+            yield f'<polyline points="{puntos}" fill="none" {trazo()}/>'
+        linea.clear()
+
+    for codigo, a, b in ordenes:
+        if codigo in (PENCOLOR, PENSIZE, PENUP):
+            yield from cerrar_linea()
+
+        if codigo == GOTO:
+            if abajo and not linea:
+                linea.append((x, y))
+            x, y = a, b
+            if abajo:
+                linea.append((x, y))
+            else:
+                yield from cerrar_linea()
+            if rellenando:
+                relleno.append((x, y))
+        elif codigo == CIRCLE:
+            yield from cerrar_linea()
+            radio, extension = a, b
+
+            # El centro queda a la izquierda de la tortuga, o a la derecha si
+            # el radio es negativo, que es cuando gira en sentido horario
+            x_centro = x - radio * sin(radians(orientacion))
+            y_centro = y + radio * cos(radians(orientacion))
+            orientacion_final = orientacion + np.sign(radio) * extension
+            x_final = x_centro + radio * sin(radians(orientacion_final))
+            y_final = y_centro - radio * cos(radians(orientacion_final))
+
+            if rellenando:
+                circulos_relleno.append((x_centro, y_centro, abs(radio), extension))
+                angulos = np.linspace(orientacion, orientacion_final, 73)
+                relleno.extend(
+                    zip(
+                        x_centro + radio * np.sin(np.radians(angulos)),
+                        y_centro - radio * np.cos(np.radians(angulos)),
+                    )
+                )
+            elif abajo and extension % 360 == 0:
+                yield (
+                    f'<circle cx="{_numero(x_centro)}" cy="{_numero(-y_centro)}" '
+                    f'r="{_numero(abs(radio))}" fill="none" {trazo()}/>'
+                )
+            elif abajo:
+                arco_largo = int(extension % 360 > 180)
+                # Como el eje y se invierte, un giro antihorario en turtle
+                # también lo es en pantalla, que para SVG es el sentido negativo
+                horario = int(radio < 0)
+                r = _numero(abs(radio))
+                yield (
+                    f'<path d="M {_punto_svg(x, y)} A {r} {r} 0 {arco_largo} '
+                    f'{horario} {_punto_svg(x_final, y_final)}" '
+                    f'fill="none" {trazo()}/>'
+                )
+            x, y, orientacion = x_final, y_final, orientacion_final % 360
+        elif codigo == DOT:
+            yield (
+                f'<circle cx="{_numero(x)}" cy="{_numero(-y)}" r="{_numero(a / 2)}" '
+                f'fill="{convertir_color_svg(b)}"/>'
+            )
+        elif codigo == PENCOLOR:
+            color_lapiz = b
+        elif codigo == FILLCOLOR:
+            color_relleno = b
+        elif codigo == PENSIZE:
+            grosor = a
+        elif codigo == PENUP:
+            abajo = False
+        elif codigo == PENDOWN:
+            abajo = True
+        elif codigo == BEGIN_FILL:
+            yield from cerrar_linea()
+            rellenando, relleno, circulos_relleno = True, [(x, y)], []
+        elif codigo == END_FILL:
+            rellenando = False
+            linea.clear()
+            lapiz = trazo() if abajo else 'stroke="none"'
+            relleno_svg = f'fill="{convertir_color_svg(color_relleno)}"'
+
+            # Un relleno formado por un único círculo completo es un círculo
+            if len(circulos_relleno) == 1 and circulos_relleno[0][3] % 360 == 0:
+                x_centro, y_centro, radio, _ = circulos_relleno[0]
+                yield (
+                    f'<circle cx="{_numero(x_centro)}" cy="{_numero(-y_centro)}" '
+                    f'r="{_numero(radio)}" {relleno_svg} {lapiz}/>'
+                )
+            elif len(relleno) > 2:
+                puntos = " ".join(_punto_svg(*punto) for punto in relleno)
+                yield f'<polygon points="{puntos}" {relleno_svg} {lapiz}/>'
+            if abajo:
+                linea.append((x, y))
+        elif codigo == SETHEADING:
+            orientacion = a % 360
+
+    yield from cerrar_linea()
+
+
+class Grabadora:
+    """
+    Imita al módulo `turtle`, pero en lugar de dibujar graba las órdenes.
+
+    Las órdenes que no cambian el estado del lápiz, como fijar el color que ya
+    tiene, no se graban. Tampoco los desplazamientos con el lápiz levantado
+    que son seguidos de otro desplazamiento.
+    """
+
+    def __init__(self):
+        self._codigos, self._argumentos, self.paleta = [], [], []
+        self._estado = {}
+        self._abajo, self._rellenando = True, False
+        self._posicion = (0.0, 0.0)
+        self._movimiento_pendiente = False
+
+    def _grabar(self, codigo, a=0.0, b=0.0):
+        self._codigos.append(codigo)
+        self._argumentos.append((a, b))
+
+    def _indice_color(self, color):
+        color = color if isinstance(color, str) else tuple(float(c) for c in color)
+        if color not in self.paleta:
+            self.paleta.append(color)
+        return self.paleta.index(color)
+
+    def _cambiar(self, codigo, valor, a=0.0, b=0.0):
+        """Graba un cambio de estado solo si cambia algo."""
+
+        if self._estado.get(codigo) == valor:
+            return
+        self._estado[codigo] = valor
+        self._movimiento_pendiente = False
+        self._grabar(codigo, a, b)
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        posicion = (float(x), float(y))
+        if posicion == self._posicion:
+            return
+
+        # Con el lápiz levantado solo importa el último destino
+        if self._movimiento_pendiente:
+            self._argumentos[-1] = posicion
+        else:
+            self._grabar(GOTO, *posicion)
+        self._movimiento_pendiente = not (self._abajo or self._rellenando)
+        self._posicion = posicion
+
+    setpos = setposition = goto
+
+    def setheading(self, angulo):
+        self._cambiar(SETHEADING, float(angulo) % 360, float(angulo) % 360)
+
+    seth = setheading
+
+    def circle(self, radio, extension=None, steps=None):
+        extension = 360.0 if extension is None else float(extension)
+        self._movimiento_pendiente = False
+        self._grabar(CIRCLE, float(radio), extension)
+
+        # Tras un arco la tortuga cambia de posición y orientación
+        if extension % 360 != 0:
+            orientacion = self._estado.get(SETHEADING, 0.0)
+            x, y = self._posicion
+            x_centro = x - radio * sin(radians(orientacion))
+            y_centro = y + radio * cos(radians(orientacion))
+            orientacion = (orientacion + np.sign(radio) * extension) % 360
+            self._posicion = (
+                x_centro + radio * sin(radians(orientacion)),
+                y_centro - radio * cos(radians(orientacion)),
+            )
+            self._estado[SETHEADING] = orientacion
+
+    def dot(self, tamano=None, *color):
+        # Como en turtle, el tamaño puede omitirse y darse solo el color
+        if isinstance(tamano, (str, tuple)):
+            tamano, color = None, (tamano, *color)
+
+        # Por defecto, turtle usa el color del lápiz y un tamaño algo mayor que
+        # su grosor
+        if tamano is None:
+            grosor = self._estado.get(PENSIZE, 1.0)
+            tamano = max(grosor + 4, 2 * grosor)
+        if color:
+            indice = self._indice_color(color[0] if len(color) == 1 else color)
+        elif PENCOLOR in self._estado:
+            indice = self._estado[PENCOLOR]
+        else:
+            indice = self._indice_color("black")
+        self._movimiento_pendiente = False
+        self._grabar(DOT, float(tamano), indice)
+
+    def pencolor(self, *color):
+        color = color[0] if len(color) == 1 else color
+        indice = self._indice_color(color)
+        self._cambiar(PENCOLOR, indice, b=indice)
+
+    def fillcolor(self, *color):
+        color = color[0] if len(color) == 1 else color
+        indice = self._indice_color(color)
+        self._cambiar(FILLCOLOR, indice, b=indice)
+
+    def pensize(self, grosor):
+        self._cambiar(PENSIZE, float(grosor), float(grosor))
+
+    width = pensize
+
+    def penup(self):
+        if self._abajo:
+            self._abajo = False
+            self._movimiento_pendiente = False
+            self._grabar(PENUP)
+
+    pu = up = penup
+
+    def pendown(self):
+        if not self._abajo:
+            self._abajo = True
+            self._movimiento_pendiente = False
+            self._grabar(PENDOWN)
+
+    pd = down = pendown
+
+    def begin_fill(self):
+        self._rellenando = True
+        self._movimiento_pendiente = False
+        self._grabar(BEGIN_FILL)
+
+    def end_fill(self):
+        self._rellenando = False
+        self._movimiento_pendiente = False
+        self._grabar(END_FILL)
+
+    def tracer(self, *args, **kwargs):
+        return 1
+
+    def __getattr__(self, nombre):
+        if nombre in IGNORADAS:
+            return lambda *args, **kwargs: None
+        raise AttributeError(f"La orden {nombre!r} de turtle no se puede grabar.")
+
+    def lista_de_dibujo(self):
+        """
+        Devuelve las órdenes grabadas hasta el momento.
+
+        Returns
+        -------
+        lista: ListaDeDibujo
+            Las órdenes grabadas.
+        """
+
+        return ListaDeDibujo(self._codigos, self._argumentos, self.paleta)
+
+
+@contextmanager
+def grabando(*modulos):
+    """
+    Graba las órdenes de turtle dadas por las funciones de los módulos.
+
+    Mientras dura el bloque `with`, el módulo `turtle` de cada uno de los
+    módulos se sustituye por una grabadora.
+
+    Parameters
+    ----------
+    *modulos: module
+        Módulos cuyas funciones dibujan con `turtle`.
+
+    Yields
+    ------
+    grabadora: Grabadora
+        La grabadora. Al terminar, `grabadora.lista_de_dibujo()` devuelve las
+        órdenes grabadas.
+
+    Examples
+    --------
+    >>> with grabando(main) as grabadora:
+    ...     main.dibujar_anillo(0, 0, 100, "blue")
+    >>> lista = grabadora.lista_de_dibujo()
+    """
+
+    grabadora = Grabadora()
+    originales = [modulo.turtle for modulo in modulos]
+    for modulo in modulos:
+        modulo.turtle = grabadora
+    try:
+        yield grabadora
+    finally:
+        for modulo, original in zip(modulos, originales):
+            modulo.turtle = original
+
+
+# ## Grabando el logo y la noche estrellada
+#
+# Como ejemplo, grabamos el logo de los Juegos Olímpicos y una noche
+# estrellada y los exportamos como SVG, el logo a dos tamaños distintos.
+
+if __name__ == "__main__":
+
+    import importlib.util
+    import random
+    from pathlib import Path
+
+    def importar(nombre, fichero):
+        especificacion = importlib.util.spec_from_file_location(nombre, fichero)
+        modulo = importlib.util.module_from_spec(especificacion)
+        especificacion.loader.exec_module(modulo)
+        return modulo
+
+    directorio = Path(__file__).parent
+    logo = importar("logo", directorio / "olympic_games_logo" / "main.py")
+    estrellas = importar("estrellas", directorio / "stars_background" / "main.py")
+
+    with grabando(logo) as grabadora:
+        radio = 100
+        for (x, y), color in zip(logo.generar_centros(radio), logo.colores):
+            logo.dibujar_anillo(x, y, radio, color, grosor=radio * 0.1)
+    lista_logo = grabadora.lista_de_dibujo()
+    lista_logo.guardar_svg("logo.svg", 800, 400)
+    lista_logo.transformar(0.25).guardar_svg("logo_icono.svg", 200, 100)
+
+    random.seed(0)
+    with grabando(estrellas) as grabadora:
+        estrellas.dibujar_cielo_nocturno(640, 480)
+        estrellas.dibujar_N_estrellas(50, 640, 480)
+    lista_estrellas = grabadora.lista_de_dibujo()
+    lista_estrellas.guardar_svg("noche_estrellada.svg")
+
+    print(f"Logo: {len(lista_logo)} órdenes, estrellas: {len(lista_estrellas)}")
@@ -0,0 +1,358 @@
+# Titulo: Dibujando sin ventana con NumPy
+# Autor: Jorge Martínez Garrido
+#
+# Turtle necesita una ventana para dibujar y termina siempre con
+# `turtle.mainloop()`. En un ordenador sin pantalla, como un servidor, no es
+# posible utilizarlo. Además, turtle traza cada figura paso a paso, por lo que
+# dibujar miles de estrellas lleva minutos.
+#
+# En este módulo dibujamos las mismas figuras que en la noche estrellada y en
+# el logo de los Juegos Olímpicos, pero sobre una imagen guardada en una matriz
+# de NumPy. La imagen se puede guardar después como un fichero PNG.
+
+# ## Atacando el problema
+#
+# Una imagen no es más que una matriz de píxeles, cada uno de ellos con su
+# color. Un píxel pertenece a un círculo de centro $(x_c, y_c)$ y radio $R$ si
+# la distancia de su centro al del círculo es menor que el radio:
+#
+# $$
+# d = \sqrt{(x - x_c)^2 + (y - y_c)^2} \leq R
+# $$
+#
+# Un anillo de grosor $g$ está formado por los píxeles cuya distancia a la
+# circunferencia es menor que la mitad del grosor, es decir, $|d - R| \leq g/2$.
+#
+# En lugar de recorrer los píxeles uno a uno, calculamos con NumPy las
+# distancias de todos los píxeles cercanos a cada figura a la vez. Para suavizar
+# los bordes, un píxel que está justo en el borde se pinta solo en parte: su
+# opacidad es la fracción del píxel que queda dentro de la figura.
+
+import struct
+import zlib
+from time import perf_counter
+
+import numpy as np
+
+# ## Colores
+#
+# Turtle acepta colores como nombres o como tuplas (r, g, b) con valores entre
+# 0 y 1. Los nombres son los de Tk, que no siempre coinciden con los de otras
+# bibliotecas: para Tk, "green" es el verde más intenso.
+
+COLORES = {
+    "black": (0, 0, 0),
+    "white": (1, 1, 1),
+    "red": (1, 0, 0),
+    "green": (0, 1, 0),
+    "blue": (0, 0, 1),
+    "yellow": (1, 1, 0),
+    "cyan": (0, 1, 1),
+    "magenta": (1, 0, 1),
+    "orange": (1, 165 / 255, 0),
+    "gray": (190 / 255, 190 / 255, 190 / 255),
+}
+
+# Máximo número de píxeles evaluados a la vez, que limita la memoria empleada
+PIXELES_POR_BLOQUE = 2**22
+
+
+def convertir_color(color):
+    """
+    Devuelve un color como una tupla (r, g, b) con valores entre 0 y 1.
+
+    Parameters
+    ----------
+    color: str or tuple
+        Nombre del color o tupla (r, g, b) con valores entre 0 y 1.
+
+    Returns
+    -------
+    rgb: ~np.ndarray
+        Los valores (r, g, b) del color.
+    """
+
+    if isinstance(color, str):
+        if color not in COLORES:
+            raise ValueError(f"Provided {color = } is not one of {list(COLORES)}.")
+        color = COLORES[color]
+
+    rgb = np.asarray(color, dtype=np.float32)
+    if rgb.shape != (3,) or rgb.min() < 0 or rgb.max() > 1:
+        raise ValueError(f"Provided {color = } is not a (r, g, b) tuple in [0, 1].")
+    return rgb
+
+
+def guardar_png(imagen, fichero):
+    """
+    Guarda una imagen en formato PNG sin necesidad de bibliotecas externas.
+
+    Parameters
+    ----------
+    imagen: ~np.ndarray
+        Matriz de alto x ancho x 3 (RGB) o x 4 (RGBA) valores de tipo uint8.
+    fichero: str
+        Ruta del fichero PNG.
+    """
+
+    alto, ancho, canales = imagen.shape
+    tipo_color = {3: 2, 4: 6}[canales]
+
+    # Cada fila de la imagen empieza por el tipo de filtro, en este caso ninguno
+    filas = np.zeros((alto, 1 + ancho * canales), dtype=np.uint8)
+    filas[:, 1:] = imagen.reshape(alto, -1)
+
+    def bloque(tipo, datos):
+        contenido = tipo + datos
+        return (
+            struct.pack(">I", len(datos))
+            + contenido
+            + struct.pack(">I", zlib.crc32(contenido))
+        )
+
+    cabecera = struct.pack(">IIBBBBB", ancho, alto, 8, tipo_color, 0, 0, 0)
+    with open(fichero, "wb") as salida:
+        salida.write(b"\x89PNG\r\n\x1a\n")
+        salida.write(bloque(b"IHDR", cabecera))
+        salida.write(bloque(b"IDAT", zlib.compress(filas.tobytes(), 6)))
+        salida.write(bloque(b"IEND", b""))
+
+
+# ## El lienzo
+#
+# El lienzo utiliza las mismas coordenadas que turtle: el origen está en el
+# centro de la imagen, el eje x apunta a la derecha y el eje y hacia arriba.
+# Cada unidad de turtle es un píxel.
+
+
+class Lienzo:
+    """
+    Una imagen sobre la que dibujar las figuras de turtle sin ventana.
+
+    Parameters
+    ----------
+    ancho: int
+        Ancho de la imagen en píxeles.
+    alto: int
+        Alto de la imagen en píxeles.
+    fondo: str or tuple
+        Color del fondo, por defecto blanco como en turtle.
+    suavizado: bool
+        Si es `True`, los bordes de las figuras se suavizan pintando en parte
+        los píxeles que solo quedan parcialmente dentro de ellas.
+    transparente: bool
+        Si es `True`, el fondo es transparente y la imagen tiene canal alfa.
+    """
+
+    def __init__(self, ancho, alto, fondo="white", suavizado=True, transparente=False):
+        self.ancho, self.alto = int(ancho), int(alto)
+        self.suavizado = suavizado
+        self.transparente = transparente
+        self.rgb = np.empty((self.alto, self.ancho, 3), dtype=np.float32)
+        self.rgb[...] = convertir_color(fondo)
+        self.alfa = np.full(
+            (self.alto, self.ancho), 0 if transparente else 1, np.float32
+        )
+
+    def _opacidad(self, distancia):
+        """Devuelve la fracción de cada píxel que queda dentro de una figura,
+        dada la distancia con signo de su centro al borde de la figura."""
+
+        if self.suavizado:
+            return np.clip(0.5 - distancia, 0, 1)
+        return (distancia <= 0).astype(np.float32)
+
+    def _pintar(self, opacidad, indices, color):
+        """Pinta un color sobre los píxeles dados con la opacidad indicada."""
+
+        # Acumulamos la transparencia de todas las figuras sobre cada píxel.
+        # Como todas tienen el mismo color, el orden en que se pintan no importa.
+        with np.errstate(divide="ignore"):
+            log_transparencia = np.bincount(
+                indices, weights=np.log1p(-opacidad), minlength=self.alto * self.ancho
+            )
+        transparencia = np.exp(log_transparencia).reshape(self.alto, self.ancho)
+
+        cubierto = transparencia < 1
+        T = transparencia[cubierto][:, None]
+        self.rgb[cubierto] = self.rgb[cubierto] * T + color * (1 - T)
+        self.alfa[cubierto] = self.alfa[cubierto] * T[:, 0] + (1 - T[:, 0])
+
+    def _pintar_circulos(self, x, y, radios, grosores, color):
+        """Pinta círculos rellenos (grosor `None`) o anillos del mismo color."""
+
+        x, y, radios = np.broadcast_arrays(*np.atleast_1d(x, y, radios))
+        radio_exterior = radios if grosores is None else radios + grosores / 2
+        color = convertir_color(color)
+
+        # Centros en coordenadas de la matriz, donde el píxel (i, j) tiene su
+        # centro en (j, i) y la fila i crece hacia abajo
+        columna_centro = x + self.ancho / 2 - 0.5
+        fila_centro = self.alto / 2 - 0.5 - y
+
+        # Agrupamos las figuras por el tamaño del cuadrado que las contiene, de
+        # modo que todas las de un grupo se evalúan a la vez
+        semilados = np.ceil(radio_exterior + 1).astype(int)
+        for semilado in np.unique(semilados):
+            (grupo,) = np.nonzero(semilados == semilado)
+            desplazamientos = np.arange(-semilado, semilado + 1)
+            N_bloque = max(1, PIXELES_POR_BLOQUE // len(desplazamientos) ** 2)
+
+            for inicio in range(0, len(grupo), N_bloque):
+                figuras = grupo[inicio : inicio + N_bloque]
+                filas = (
+                    np.rint(fila_centro[figuras])[:, None, None]
+                    + desplazamientos[None, :, None]
+                )
+                columnas = (
+                    np.rint(columna_centro[figuras])[:, None, None]
+                    + desplazamientos[None, None, :]
+                )
+                d = np.hypot(
+                    columnas - columna_centro[figuras, None, None],
+                    filas - fila_centro[figuras, None, None],
+                )
+
+                # Distancia con signo al borde: negativa dentro de la figura
+                if grosores is None:
+                    distancia = d - radios[figuras, None, None]
+                else:
+                    distancia = (
+                        np.abs(d - radios[figuras, None, None])
+                        - np.broadcast_to(grosores, radios.shape)[figuras, None, None]
+                        / 2
+                    )
+
+                opacidad = self._opacidad(distancia)
+                dentro = (
+                    (opacidad > 0)
+                    & (filas >= 0)
+                    & (filas < self.alto)
+                    & (columnas >= 0)
+                    & (columnas < self.ancho)
+                )
+                indices = (filas * self.ancho + columnas)[dentro].astype(np.intp)
+                self._pintar(opacidad[dentro], indices, color)
+
+    def dibujar_cielo_nocturno(self, base, altura, color=(0, 0, 0)):
+        """
+        Dibuja un rectángulo centrado de ancho y alto deseados.
+
+        Parameters
+        ----------
+        base: float
+            Ancho del rectángulo para el cielo.
+        altura: float
+            Alto del rectángulo para el cielo.
+        color: tuple
+            Color del cielo, por defecto en negro.
+        """
+
+        # La distancia al borde se mide por separado en cada eje
+        x = np.arange(self.ancho) + 0.5 - self.ancho / 2
+        y = self.alto / 2 - 0.5 - np.arange(self.alto)
+        opacidad = self._opacidad(np.abs(y)[:, None] - altura / 2) * self._opacidad(
+            np.abs(x)[None, :] - base / 2
+        )
+
+        (indices,) = np.nonzero(opacidad.ravel())
+        self._pintar(opacidad.ravel()[indices], indices, convertir_color(color))
+
+    def dibujar_estrella(self, x, y, radio, color=(1, 1, 1)):
+        """
+        Dibuja una o muchas estrellas, es decir, círculos rellenos.
+
+        Parameters
+        ----------
+        x: float or ~np.ndarray
+            Coordenadas horizontales de los centros de las estrellas.
+        y: float or ~np.ndarray
+            Coordenadas verticales de los centros de las estrellas.
+        radio: float or ~np.ndarray
+            Radios de las estrellas.
+        color: tuple or ~np.ndarray
+            Un tuple con los valores (r, g, b) para el color de las estrellas o
+            una matriz con el color de cada una de ellas.
+        """
+
+        if isinstance(color, str) or np.ndim(color) == 1:
+            self._pintar_circulos(x, y, radio, None, color)
+            return
+
+        # Las estrellas de cada color se pintan juntas, un color tras otro
+        x, y, radio = np.broadcast_arrays(*np.atleast_1d(x, y, radio))
+        paleta, grupos = np.unique(np.asarray(color), axis=0, return_inverse=True)
+        for i, color_grupo in enumerate(paleta):
+            en_grupo = grupos.ravel() == i
+            self._pintar_circulos(
+                x[en_grupo], y[en_grupo], radio[en_grupo], None, color_grupo
+            )
+
+    def dibujar_anillo(self, x, y, radio, color=(0, 0, 0), grosor=2.5):
+        """
+        Dibuja uno o muchos anillos dados su centro, radio, color y grosor.
+
+        Parameters
+        ----------
+        x: float or ~np.ndarray
+            Coordenadas horizontales de los centros de los anillos.
+        y: float or ~np.ndarray
+            Coordenadas verticales de los centros de los anillos.
+        radio: float or ~np.ndarray
+            Radios de los anillos.
+        color: tuple
+            Un tuple con los valores (r, g, b) para el color de los anillos.
+        grosor: float or ~np.ndarray
+            Grosor de la línea de los anillos.
+        """
+
+        self._pintar_circulos(x, y, radio, np.asarray(grosor, dtype=float), color)
+
+    def a_imagen(self):
+        """
+        Devuelve la imagen como una matriz de enteros entre 0 y 255.
+
+        Returns
+        -------
+        imagen: ~np.ndarray
+            Matriz de alto x ancho x 3 valores (r, g, b), o x 4 si el fondo es
+            transparente.
+        """
+
+        capas = [self.rgb] + ([self.alfa[..., None]] if self.transparente else [])
+        return np.rint(np.concatenate(capas, axis=2) * 255).astype(np.uint8)
+
+    def guardar(self, fichero):
+        """
+        Guarda la imagen como un fichero PNG.
+
+        Parameters
+        ----------
+        fichero: str
+            Ruta del fichero PNG.
+        """
+
+        guardar_png(self.a_imagen(), fichero)
+
+
+# ## Una noche estrellada en 4K
+#
+# Como ejemplo, dibujamos una noche estrellada con cien mil estrellas en una
+# imagen de 3840 x 2160 píxeles y medimos cuánto se tarda en hacerlo.
+
+if __name__ == "__main__":
+
+    inicio = perf_counter()
+    base, altura, N_estrellas, radio_max = 3840, 2160, 100_000, 5
+
+    # Generamos todas las estrellas a la vez
+    generador = np.random.default_rng(0)
+    x = (generador.random(N_estrellas) - 0.5) * base
+    y = (generador.random(N_estrellas) - 0.5) * altura
+    radios = generador.random(N_estrellas) * radio_max
+
+    lienzo = Lienzo(base, altura)
+    lienzo.dibujar_cielo_nocturno(base, altura)
+    lienzo.dibujar_estrella(x, y, radios)
+    lienzo.guardar("noche_estrellada.png")
+    print(f"Imagen dibujada en {perf_counter() - inicio:.3f} segundos")
@@ -0,0 +1,244 @@
+# Titulo: La geometría del logo de los Juegos Olímpicos, calculada una vez
+# Autor: Jorge Martínez Garrido
+#
+# Todo el logo está proporcionado al radio de los anillos. Por eso, basta con
+# calcular su geometría una sola vez para un radio igual a la unidad: los
+# centros de los anillos, los puntos de una circunferencia y los tramos donde
+# unos anillos pasan por encima de otros. Para cualquier otro radio, todo se
+# obtiene multiplicando por el radio, sin repetir ningún cálculo.
+
+# ## Atacando el problema
+#
+# Con un radio $R = 1$, la separación entre anillos es $\Delta x = 1/4$ y las
+# distancias entre centros son $d_x = 2 + \Delta x$ y $d_y = 1 + \Delta x$. Los
+# tres anillos superiores están en $y = d_y / 2$ y los dos inferiores en
+# $y = -d_y / 2$, justo entre los superiores.
+#
+# En el logo real los anillos están entrelazados: cada anillo inferior cruza
+# dos veces a cada uno de sus vecinos superiores, y en uno de los cruces pasa
+# por encima y en el otro por debajo. Para conseguirlo, dibujamos primero todos
+# los anillos y después volvemos a dibujar, sobre los inferiores, un pequeño
+# arco de los superiores alrededor del cruce de más arriba.
+#
+# Los puntos de un anillo superior de centro $c_A$ que quedan a una distancia
+# $\rho$ del centro $c_B$ de un anillo inferior cumplen, por el teorema del
+# coseno:
+#
+# $$
+# \cos(\theta - \alpha) = \frac{D^2 + R^2 - \rho^2}{2 R D}
+# $$
+#
+# donde $D$ es la distancia entre centros y $\alpha$ el ángulo de $c_B - c_A$.
+# Los anillos se solapan mientras $\rho$ está entre $R - g$ y $R + g$, siendo
+# $g$ el grosor de la línea.
+
+from functools import lru_cache
+
+import numpy as np
+
+# Proporciones del logo respecto al radio de los anillos
+SEPARACION_RELATIVA = 1 / 4
+GROSOR_RELATIVO = 0.1
+
+# Colores de los anillos: tres arriba y dos abajo
+COLORES_LOGO = ("blue", "black", "red", "yellow", "green")
+
+# Pares (superior, inferior) de anillos que se cruzan
+CRUCES = ((0, 3), (1, 3), (1, 4), (2, 4))
+
+
+def _solo_lectura(matriz):
+    """Evita que una matriz memorizada se modifique por error."""
+
+    matriz.flags.writeable = False
+    return matriz
+
+
+@lru_cache(maxsize=None)
+def centros_unitarios():
+    """
+    Devuelve los centros de los cinco anillos para un radio unidad.
+
+    Returns
+    -------
+    centros: ~np.ndarray
+        Matriz de solo lectura con las coordenadas (x, y) de cada centro.
+    """
+
+    d_x = 2 + SEPARACION_RELATIVA
+    d_y = 1 + SEPARACION_RELATIVA
+    return _solo_lectura(
+        np.array(
+            [
+                (-d_x, d_y / 2),
+                (0, d_y / 2),
+                (d_x, d_y / 2),
+                (-d_x / 2, -d_y / 2),
+                (d_x / 2, -d_y / 2),
+            ]
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def contorno_unitario(N_vertices=120):
+    """
+    Devuelve los vértices de una circunferencia de radio unidad.
+
+    Parameters
+    ----------
+    N_vertices: int
+        Número de lados del polígono que aproxima la circunferencia.
+
+    Returns
+    -------
+    contorno: ~np.ndarray
+        Matriz de solo lectura con N_vertices + 1 puntos (x, y). Empieza y
+        termina en el punto norte y gira en sentido antihorario, como turtle.
+    """
+
+    angulos = np.pi / 2 + np.linspace(0, 2 * np.pi, N_vertices + 1)
+    return _solo_lectura(np.column_stack((np.cos(angulos), np.sin(angulos))))
+
+
+@lru_cache(maxsize=None)
+def arcos_por_encima(grosor_relativo=GROSOR_RELATIVO, N_vertices=16):
+    """
+    Devuelve los arcos de los anillos superiores que pasan por encima de los
+    inferiores, para un radio unidad.
+
+    Parameters
+    ----------
+    grosor_relativo: float
+        Grosor de la línea de los anillos dividido por su radio.
+    N_vertices: int
+        Número de lados de cada arco.
+
+    Returns
+    -------
+    anillos: ~np.ndarray
+        Índice del anillo superior al que pertenece cada arco.
+    angulos: ~np.ndarray
+        Matriz con los ángulos inicial y final de cada arco, en radianes y
+        medidos desde el centro de su anillo.
+    arcos: ~np.ndarray
+        Matriz de solo lectura con los N_vertices + 1 puntos (x, y) de cada
+        arco, ya desplazados al centro de su anillo.
+    """
+
+    centros = centros_unitarios()
+    g = grosor_relativo
+
+    anillos, angulos = [], []
+    for superior, inferior in CRUCES:
+        diferencia = centros[inferior] - centros[superior]
+        D = np.hypot(*diferencia)
+        alfa = np.arctan2(diferencia[1], diferencia[0])
+
+        # De los dos cruces, el de más arriba
+        giro = np.arccos(D / 2)
+        signo = 1 if np.sin(alfa + giro) > np.sin(alfa - giro) else -1
+        limites = [
+            alfa + signo * np.arccos((D**2 + 1 - (1 + g * s) ** 2) / (2 * D))
+            for s in (1, -1)
+        ]
+        anillos.append(superior)
+        angulos.append(sorted(limites))
+
+    anillos, angulos = np.array(anillos), np.array(angulos)
+    t = angulos[:, :1] + (angulos[:, 1:] - angulos[:, :1]) * np.linspace(
+        0, 1, N_vertices + 1
+    )
+    arcos = centros[anillos][:, None, :] + np.stack((np.cos(t), np.sin(t)), axis=-1)
+    return _solo_lectura(anillos), _solo_lectura(angulos), _solo_lectura(arcos)
+
+
+def geometria_logo(radio, grosor=None, N_vertices=120, centro=(0, 0)):
+    """
+    Devuelve la geometría completa del logo para un radio dado.
+
+    Parameters
+    ----------
+    radio: float
+        Radio de los anillos. Se utiliza para escalar todo el dibujo.
+    grosor: float
+        Grosor de la línea de los anillos. Por defecto, proporcional al radio.
+    N_vertices: int
+        Número de lados del polígono que aproxima cada anillo.
+    centro: tuple
+        Posición (x, y) del centro del logo.
+
+    Returns
+    -------
+    centros: ~np.ndarray
+        Coordenadas (x, y) de los centros de los cinco anillos.
+    contornos: ~np.ndarray
+        Matriz de 5 x (N_vertices + 1) puntos (x, y) del contorno de cada
+        anillo.
+    anillos_arcos: ~np.ndarray
+        Índice del anillo superior al que pertenece cada arco entrelazado.
+    arcos: ~np.ndarray
+        Puntos (x, y) de cada uno de los arcos que pasan por encima.
+    grosor: float
+        Grosor de la línea de los anillos.
+
+    Notes
+    -----
+    Todo lo que no depende del radio se calcula solo la primera vez. Si el
+    grosor no es proporcional al radio, los arcos entrelazados se calculan de
+    nuevo para la nueva proporción.
+    """
+
+    grosor = GROSOR_RELATIVO * radio if grosor is None else grosor
+    anillos_arcos, _, arcos = arcos_por_encima(round(grosor / radio, 12))
+
+    # Una única transformación afín: escalar y desplazar
+    centros = radio * centros_unitarios() + centro
+    contornos = radio * contorno_unitario(N_vertices) + centros[:, None, :]
+    return centros, contornos, anillos_arcos, radio * arcos + centro, grosor
+
+
+def dibujar_logo(radio=150, grosor=None, colores=COLORES_LOGO, tortuga=None):
+    """
+    Dibuja el logo entrelazado con turtle a partir de su geometría.
+
+    Parameters
+    ----------
+    radio: float
+        Radio de los anillos.
+    grosor: float
+        Grosor de la línea de los anillos. Por defecto, proporcional al radio.
+    colores: list
+        Colores de los cinco anillos.
+    tortuga: turtle.Turtle
+        Tortuga con la que dibujar. Por defecto, la del módulo `turtle`.
+    """
+
+    if tortuga is None:
+        import turtle as tortuga
+
+    _, contornos, anillos_arcos, arcos, grosor = geometria_logo(radio, grosor)
+    tortuga.pensize(grosor)
+
+    # Primero los anillos completos y después, encima, los arcos entrelazados
+    trazos = list(zip(contornos, colores))
+    trazos += [(arco, colores[i]) for i, arco in zip(anillos_arcos, arcos)]
+    for puntos, color in trazos:
+        tortuga.penup()
+        tortuga.goto(*puntos[0])
+        tortuga.pencolor(color)
+        tortuga.pendown()
+        for x, y in puntos[1:].tolist():
+            tortuga.goto(x, y)
+    tortuga.penup()
+
+
+if __name__ == "__main__":
+
+    import turtle
+
+    turtle.hideturtle()
+    turtle.tracer(0)
+    dibujar_logo(150)
+    turtle.update()
+    turtle.mainloop()
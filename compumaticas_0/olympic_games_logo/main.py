@@ -1,6 +1,6 @@
 # Titulo: Dibujando el logo de los Juegos Olímpicos con Python turtle
 # Autor: Jorge Martínez Garrido
-# 
+#
 # Vamos a ver cómo podemos dibujar el logo de los Juegos Olímpicos con Python
 # turtle. Sin embargo vamos a añadir una condición: el logo debe de estar
 # proporcionado al radio de los anillos que lo forman.
@@ -162,7 +162,7 @@ def generar_centros(radio):
     lista_centros = []
 
     # Resolvemos los centros teniendo en cuenta en qué fila estamos
-    for i in range(6):
+    for i in range(5):
         x_centro = d_x * (i - 1) if i < 3 else d_x * (i - 3.5)
         y_centro = d_y / 2 if i < 3 else -d_y / 2
         centro = (x_centro, y_centro)
@@ -180,16 +180,21 @@ def generar_centros(radio):
 
 colores = ["blue", "black", "red", "yellow", "green"]
 
-# Ahora, definimos el radio deseado y generamos los círculos:
+# Ahora, definimos el radio deseado y generamos los círculos. Utilizamos un
+# bucle para pintar los cinco anillos:
+
+if __name__ == "__main__":
 
-radio = 150
-lista_centros = generar_centros(radio)
+    radio = 150
+    lista_centros = generar_centros(radio)
 
-# Utilizamos un bucle para pintar los cinco anillos:
+    for (x_centro, y_centro), color in zip(lista_centros, colores):
+        dibujar_anillo(x_centro, y_centro, radio, color, grosor=radio * 0.1)
+    turtle.mainloop()
 
-for (x_centro, y_centro), color in zip(lista_centros, colores):
-    dibujar_anillo(x_centro, y_centro, radio, color, grosor=radio * 0.1)
-turtle.mainloop()
+# Si necesitas dibujar el logo muchas veces y a distintos tamaños, el módulo
+# `geometria.py` calcula una sola vez los centros, los contornos de los anillos
+# y los tramos donde se entrelazan, y los escala al radio deseado.
 
 # ## Resultado
 #
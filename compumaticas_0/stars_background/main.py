@@ -151,12 +151,14 @@ def dibujar_estrella(x, y, radio, color=(1, 1, 1)):
 # ello, debemos restar la mitad de la base y altura del rectángula a la hora de
 # generar las coordenadas aleatorias de los puntos.
 
+from itertools import repeat
 from random import random
+from time import perf_counter
 
 # Tras importar las funciones `random` para generar números aleatorios escribimos la función:
 
 
-def dibujar_N_estrellas(N_estrellas, base, altura, radio_max=5):
+def dibujar_N_estrellas(N_estrellas, base, altura, radio_max=5, por_lotes=False):
     """
     Dibuja un número N de estrellas.
 
@@ -170,8 +172,24 @@ def dibujar_N_estrellas(N_estrellas, base, altura, radio_max=5):
         Alto del rectángulo donde dibujar las estrellas.
     radio_max: float
         Máximo radio posible para una estrella.
+    por_lotes: bool
+        Si es `True`, se generan primero todas las estrellas y se dibujan de
+        una sola pasada sin refrescar la pantalla hasta el final. Es mucho más
+        rápido cuando el número de estrellas es grande.
+
+    Returns
+    -------
+    tiempo: float
+        Segundos empleados en dibujar las estrellas.
     """
 
+    inicio = perf_counter()
+
+    if por_lotes:
+        return dibujar_estrellas_por_lotes(
+            generar_estrellas(N_estrellas, base, altura, radio_max), inicio
+        )
+
     for i in range(N_estrellas):
 
         # Generamos valores aleatorios de x e y del ancho y el alto
@@ -184,6 +202,103 @@ def dibujar_N_estrellas(N_estrellas, base, altura, radio_max=5):
         # Dibujamos la estrella
         dibujar_estrella(x_estrella, y_extrella, radio_estrella)
 
+    return perf_counter() - inicio
+
+
+# ## Dibujando miles de estrellas
+#
+# Cada llamada a `dibujar_estrella` mueve la tortuga, cambia el color y traza
+# un círculo paso a paso, refrescando la pantalla tras cada movimiento. Incluso
+# con `turtle.speed(0)`, dibujar decenas de miles de estrellas lleva minutos.
+#
+# Para acelerarlo podemos separar el trabajo en dos partes: primero generamos
+# todas las posiciones y radios, y después las dibujamos de una sola vez con el
+# refresco de pantalla desactivado mediante `turtle.tracer(0)`. Al terminar,
+# `turtle.update()` muestra el resultado completo. Además, cada estrella se
+# dibuja con `turtle.dot`, que pinta un círculo relleno en una sola orden en
+# lugar de trazarlo segmento a segmento.
+
+
+def generar_estrellas(N_estrellas, base, altura, radio_max=5):
+    """
+    Devuelve las posiciones y radios aleatorios de N estrellas.
+
+    Parameters
+    ----------
+    N_estrellas: int
+        Número deseado de estrellas.
+    base: float
+        Ancho del rectángulo donde situar las estrellas.
+    altura: float
+        Alto del rectángulo donde situar las estrellas.
+    radio_max: float
+        Máximo radio posible para una estrella.
+
+    Returns
+    -------
+    lista_estrellas: list
+        Lista con tuplas conteniendo las coordenadas x e y y el radio de cada
+        estrella.
+    """
+
+    # Los números se generan en el mismo orden que en `dibujar_N_estrellas`,
+    # por lo que con la misma semilla se obtienen las mismas estrellas
+    return [
+        ((random() - 0.5) * base, (random() - 0.5) * altura, random() * radio_max)
+        for i in range(N_estrellas)
+    ]
+
+
+def dibujar_estrellas_por_lotes(
+    lista_estrellas, inicio=None, color=(1, 1, 1), colores=None
+):
+    """
+    Dibuja todas las estrellas de una sola pasada y refresca la pantalla al
+    final.
+
+    Parameters
+    ----------
+    lista_estrellas: list
+        Lista con tuplas conteniendo las coordenadas x e y y el radio de cada
+        estrella.
+    inicio: float
+        Instante, según `time.perf_counter`, desde el que medir el tiempo. Por
+        defecto, el momento en que se llama a la función.
+    color: tuple
+        Un tuple con los valores (r, g, b) para el color de las estrellas.
+    colores: list
+        Color de cada una de las estrellas. Si se indica, se ignora `color`.
+
+    Returns
+    -------
+    tiempo: float
+        Segundos empleados en dibujar las estrellas.
+    """
+
+    if inicio is None:
+        inicio = perf_counter()
+
+    # Desactivamos el refresco de pantalla, recordando el valor anterior
+    trazador = turtle.tracer()
+    turtle.tracer(0)
+    turtle.penup()
+
+    # Un punto de diámetro igual a dos radios es una estrella rellena. El
+    # refresco se restaura aunque falle el dibujo.
+    if colores is None:
+        colores = repeat(color)
+    try:
+        for (x, y, radio), color_estrella in zip(lista_estrellas, colores):
+            turtle.goto(x, y)
+            turtle.dot(2 * radio, color_estrella)
+
+        # Mostramos todas las estrellas de una vez
+        turtle.update()
+    finally:
+        turtle.tracer(trazador)
+
+    return perf_counter() - inicio
+
 
 # ## Dibujando la noche estrellada
 #
@@ -194,17 +309,21 @@ def dibujar_N_estrellas(N_estrellas, base, altura, radio_max=5):
 # `turtle.speed(0)`.
 
 # +
-# Escondemos la tortuga y le damos la máxima velocidad
-turtle.hideturtle()
-turtle.speed(0)
+if __name__ == "__main__":
+
+    # Escondemos la tortuga y le damos la máxima velocidad
+    turtle.hideturtle()
+    turtle.speed(0)
 
-# Establecemos la resolución de pantalla (alto y ancho del rectángulo)
-resolucion = (640, 480)
+    # Establecemos la resolución de pantalla (alto y ancho del rectángulo)
+    resolucion = (640, 480)
 
-# Dibujamos el cielo nocturno y un total de 50 estrellas
-dibujar_cielo_nocturno(*resolucion)
-dibujar_N_estrellas(50, *resolucion)
-turtle.mainloop()
+    # Dibujamos el cielo nocturno y un total de 50 estrellas. Para cielos
+    # mucho más densos, prueba con `por_lotes=True` y miles de estrellas.
+    dibujar_cielo_nocturno(*resolucion)
+    tiempo = dibujar_N_estrellas(50, *resolucion)
+    print(f"Estrellas dibujadas en {tiempo:.3f} segundos")
+    turtle.mainloop()
 # -
 
 # ## Resultado
@@ -0,0 +1,364 @@
+"""
+A benchmark for the Monte Carlo integration engine.
+
+Each case integrates a function with a known exact value and records the wall
+time, the number of points per second, the peak memory of the process and of
+its workers, and the absolute error. Results are written as JSON, so different
+versions of the engine can be compared. Run `python benchmark.py --help` for
+the available options.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from main import (
+    METHODS,
+    SAMPLERS,
+    f_at_x,
+    montecarlo_integral,
+    montecarlo_vegas,
+)
+
+
+def weighted_f_at_x(x):
+    """The quarter circle weighted by x ** 2, whose maximum lies inside [0, 1].
+
+    Parameters
+    ----------
+    x: float
+        The independent variable.
+
+    Returns
+    -------
+    f_x: float
+        The value of the function evaluated at given point.
+    """
+
+    return np.sqrt(1 - x**2) * x**2
+
+
+def peaked_f_at_x(x):
+    """A narrow Gaussian peak centered in [0, 1].
+
+    Parameters
+    ----------
+    x: float
+        The independent variable.
+
+    Returns
+    -------
+    f_x: float
+        The value of the function evaluated at given point.
+    """
+
+    return np.exp(-(((x - 0.5) / 0.01) ** 2))
+
+
+def gaussian_f_at_x(x):
+    """A Gaussian centered at the origin of a d-dimensional space.
+
+    Parameters
+    ----------
+    x: ~np.ndarray
+        An Nxd matrix holding the coordinates of the points.
+
+    Returns
+    -------
+    f_x: ~np.ndarray
+        The value of the function evaluated at given points.
+    """
+
+    return np.exp(-np.sum(x**2, axis=1))
+
+
+def cosine_f_at_x(x):
+    """The product of the cosines of all the coordinates of a point.
+
+    Parameters
+    ----------
+    x: ~np.ndarray
+        An Nxd matrix holding the coordinates of the points.
+
+    Returns
+    -------
+    f_x: ~np.ndarray
+        The value of the function evaluated at given points.
+    """
+
+    return np.prod(np.cos(x), axis=1)
+
+
+def control_f_at_x(x):
+    """Taylor expansion of the quarter circle, used as control variate.
+
+    Parameters
+    ----------
+    x: float
+        The independent variable.
+
+    Returns
+    -------
+    g_x: float
+        The value of the function evaluated at given point.
+    """
+
+    return 1 - x**2 / 2
+
+
+# Catalogue of integrands: function, limits, exact value and control variate
+INTEGRANDS = {
+    "quarter-circle": (f_at_x, (0, 1), math.pi / 4, (control_f_at_x, 5 / 6)),
+    "weighted-quarter-circle": (weighted_f_at_x, (0, 1), math.pi / 16, None),
+    "peak": (peaked_f_at_x, (0, 1), 0.01 * math.sqrt(math.pi) * math.erf(50), None),
+    "gaussian-5d": (
+        gaussian_f_at_x,
+        [(0, 1)] * 5,
+        (math.sqrt(math.pi) / 2 * math.erf(1)) ** 5,
+        None,
+    ),
+    "cosine-10d": (cosine_f_at_x, [(0, 1)] * 10, math.sin(1) ** 10, None),
+}
+
+
+def _peak_rss_mb(who="self"):
+    """Returns the peak resident memory in megabytes, or `None` if it can not be
+    measured in this platform.
+
+    Parameters
+    ----------
+    who: str
+        Either "self", for this process, or "children", for the largest of its
+        finished child processes, such as the workers of a pool.
+
+    Returns
+    -------
+    peak_rss: float
+        Peak resident memory in megabytes.
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Linux reports kilobytes while macOS reports bytes
+    usage = resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN
+    peak_rss = resource.getrusage(usage).ru_maxrss
+    return peak_rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def run_case(integrand, method, sampler, N_points, workers, seed=0):
+    """Integrates one of the catalogued functions and measures the run.
+
+    Parameters
+    ----------
+    integrand: str
+        Name of the function, one of `INTEGRANDS`.
+    method: str
+        Estimator to be used, one of `METHODS` or "vegas".
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+    N_points: int
+        Number of points.
+    workers: int
+        Number of processes.
+    seed: int
+        Seed for the random streams.
+
+    Returns
+    -------
+    record: dict
+        The options of the case together with its measurements.
+    """
+
+    function, limits, exact, control = INTEGRANDS[integrand]
+
+    def integrate(N_points):
+        if method == "vegas":
+            # Warm-up iterations are part of the cost of the method
+            return montecarlo_vegas(
+                function,
+                limits,
+                N_points=N_points / 15,
+                N_iterations=10,
+                N_warmup=5,
+                seed=seed,
+            )
+        return montecarlo_integral(
+            function,
+            limits,
+            N_points=N_points,
+            seed=seed,
+            workers=workers,
+            method=method,
+            control=control,
+            sampler=sampler,
+            full_output=True,
+        )
+
+    # A first tiny run pays for lazy imports and caches, so they are not
+    # measured as part of the case
+    integrate(256)
+
+    start_time = time.perf_counter()
+    result = integrate(N_points)
+    wall_time = time.perf_counter() - start_time
+    N_used = result.N_points * (1.5 if method == "vegas" else 1)
+
+    return {
+        "integrand": integrand,
+        "dimensions": len(np.atleast_2d(limits)),
+        "method": method,
+        "sampler": sampler,
+        "workers": workers,
+        "N_points": int(N_used),
+        "wall_time": wall_time,
+        "points_per_second": N_used / wall_time,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_rss_workers_mb": _peak_rss_mb("children") if workers > 1 else None,
+        "I_val": result.I_val,
+        "exact": exact,
+        "abs_error": abs(result.I_val - exact),
+        "std_error": result.std_error,
+    }
+
+
+def _run_isolated(case):
+    """Runs a case in a fresh process, so its peak memory is not polluted by the
+    previous ones.
+
+    Parameters
+    ----------
+    case: dict
+        Keyword arguments for `run_case`.
+
+    Returns
+    -------
+    record: dict
+        The options of the case together with its measurements.
+    """
+
+    # A new executor starts a new process, which runs this case only
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_case, **case).result()
+
+
+def run_benchmark(
+    integrands=tuple(INTEGRANDS),
+    methods=METHODS,
+    samplers=("pseudo-random",),
+    N_points=(1e4, 1e5, 1e6),
+    workers=(1,),
+    repeat=1,
+):
+    """Runs all the combinations of the given options.
+
+    Parameters
+    ----------
+    integrands: list
+        Names of the functions, from `INTEGRANDS`.
+    methods: list
+        Estimators, from `METHODS` or "vegas".
+    samplers: list
+        Generators of points, from `SAMPLERS`.
+    N_points: list
+        Numbers of points.
+    workers: list
+        Numbers of processes.
+    repeat: int
+        Number of runs of each case. Only the fastest one is kept.
+
+    Returns
+    -------
+    records: list
+        The measurements of each one of the cases.
+    """
+
+    records = []
+    for integrand in integrands:
+        _, _, _, control = INTEGRANDS[integrand]
+        for method in methods:
+            # Some combinations are not meaningful
+            if method == "control-variate" and control is None:
+                continue
+            method_samplers = ("pseudo-random",) if method == "vegas" else samplers
+            method_workers = (1,) if method == "vegas" else workers
+            for sampler in method_samplers:
+                for N in N_points:
+                    for N_workers in method_workers:
+                        case = dict(
+                            integrand=integrand,
+                            method=method,
+                            sampler=sampler,
+                            N_points=int(N),
+                            workers=N_workers,
+                        )
+                        runs = [_run_isolated(case) for _ in range(repeat)]
+                        record = min(runs, key=lambda run: run["wall_time"])
+                        records.append(record)
+                        print(
+                            f"{integrand:>24} {method:>16} {sampler:>14} "
+                            f"N={record['N_points']:<9d} w={N_workers:<3d} "
+                            f"{record['points_per_second']:10.3e} pts/s "
+                            f"err={record['abs_error']:.2e}",
+                            file=sys.stderr,
+                        )
+    return records
+
+
+def main():
+    """Entry point of the script."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--integrands", nargs="+", default=list(INTEGRANDS))
+    parser.add_argument("--methods", nargs="+", default=list(METHODS))
+    parser.add_argument("--samplers", nargs="+", default=["pseudo-random"])
+    parser.add_argument("--N-points", nargs="+", type=float, default=[1e4, 1e5, 1e6])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    for name, values, valid in [
+        ("integrands", args.integrands, INTEGRANDS),
+        ("methods", args.methods, (*METHODS, "vegas")),
+        ("samplers", args.samplers, SAMPLERS),
+    ]:
+        unknown = set(values) - set(valid)
+        if unknown:
+            parser.error(f"Unknown {name} {sorted(unknown)}, use any of {valid}.")
+
+    records = run_benchmark(
+        args.integrands,
+        args.methods,
+        args.samplers,
+        args.N_points,
+        args.workers,
+        args.repeat,
+    )
+
+    # Keep track of the environment, so results from different machines are
+    # not mixed up
+    report = {
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "records": records,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {args.output}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
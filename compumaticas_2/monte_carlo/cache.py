@@ -0,0 +1,180 @@
+"""
+A persistent cache for the statistics of Monte Carlo integrations.
+
+Results are stored per random stream, so a cached integration can be extended
+with more points by drawing only the missing ones. Entries are kept in memory
+with least-recently-used eviction and, optionally, on disk as `.npz` files
+named after the hash of the integration.
+"""
+
+import functools
+import hashlib
+import os
+import tempfile
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _update_fingerprint(digest, obj):
+    """Feeds the content of an object into a hash.
+
+    Parameters
+    ----------
+    digest: hashlib object
+        The hash being computed.
+    obj: object
+        A function, a code object or any value with a stable representation.
+    """
+
+    if isinstance(obj, types.CodeType):
+        # Names are needed too, since np.sin and np.cos only differ in them
+        digest.update(obj.co_code)
+        digest.update(repr(obj.co_names).encode())
+        for constant in obj.co_consts:
+            _update_fingerprint(digest, constant)
+    elif isinstance(obj, functools.partial):
+        _update_fingerprint(digest, obj.func)
+        _update_fingerprint(digest, obj.args)
+        _update_fingerprint(digest, sorted(obj.keywords.items()))
+    elif hasattr(obj, "__code__"):
+        _update_fingerprint(digest, obj.__code__)
+        _update_fingerprint(digest, obj.__defaults__)
+        _update_fingerprint(digest, obj.__kwdefaults__)
+        for cell in obj.__closure__ or ():
+            _update_fingerprint(digest, cell.cell_contents)
+    elif isinstance(obj, (tuple, list)):
+        digest.update(b"(")
+        for item in obj:
+            _update_fingerprint(digest, item)
+        digest.update(b")")
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        digest.update(repr(obj).encode())
+
+
+def make_key(*parts):
+    """Returns a content-addressed key for an integration.
+
+    Parameters
+    ----------
+    *parts: tuple
+        The integrand, the control function and the rest of the parameters
+        which determine the result.
+
+    Returns
+    -------
+    key: str
+        Hexadecimal SHA-256 hash of all the parts.
+
+    Notes
+    -----
+    Functions are identified by their bytecode, the names and the constants
+    they use, their default values and the content of their closures. Global
+    variables read by a function are not part of its key, so changing them
+    requires clearing the cache.
+    """
+
+    digest = hashlib.sha256()
+    for part in parts:
+        _update_fingerprint(digest, part)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Statistics of previous integrations, kept in memory and on disk.
+
+    Parameters
+    ----------
+    path: str
+        Directory holding the cached results. If `None`, results are only kept
+        in memory.
+    maxsize: int
+        Maximum number of results kept in memory. The least recently used one
+        is dropped first.
+    """
+
+    def __init__(self, path=None, maxsize=128):
+        self.path = None if path is None else os.path.expanduser(path)
+        self.maxsize = int(maxsize)
+        self._memory = OrderedDict()
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        """Returns the path of the file holding a result."""
+
+        return os.path.join(self.path, f"{key}.npz")
+
+    def get(self, key):
+        """Returns the statistics of each stream of a cached integration.
+
+        Parameters
+        ----------
+        key: str
+            Key of the integration, see `make_key`.
+
+        Returns
+        -------
+        stream_moments: list
+            Number of samples, mean vector and matrix of co-moments of each
+            random stream, or `None` if the integration is not cached.
+        """
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if self.path is None or not os.path.exists(self._file(key)):
+            return None
+        with np.load(self._file(key)) as stored:
+            stream_moments = list(
+                zip(stored["N"].tolist(), stored["mean"], stored["M2"])
+            )
+        self._remember(key, stream_moments)
+        return stream_moments
+
+    def put(self, key, stream_moments):
+        """Stores the statistics of each stream of an integration.
+
+        Parameters
+        ----------
+        key: str
+            Key of the integration, see `make_key`.
+        stream_moments: list
+            Number of samples, mean vector and matrix of co-moments of each
+            random stream.
+        """
+
+        self._remember(key, stream_moments)
+        if self.path is None:
+            return
+
+        # Write into a temporary file first, so concurrent readers never find
+        # a half-written result
+        N, mean, M2 = zip(*stream_moments)
+        file_descriptor, temporary_file = tempfile.mkstemp(suffix=".npz", dir=self.path)
+        with os.fdopen(file_descriptor, "wb") as output_file:
+            np.savez(output_file, N=np.array(N), mean=np.array(mean), M2=np.array(M2))
+        os.replace(temporary_file, self._file(key))
+
+    def clear(self):
+        """Removes all the cached results, both from memory and from disk."""
+
+        self._memory.clear()
+        if self.path is None:
+            return
+        for file_name in os.listdir(self.path):
+            if file_name.endswith(".npz"):
+                os.remove(os.path.join(self.path, file_name))
+
+    def _remember(self, key, stream_moments):
+        """Keeps a result in memory, evicting the least recently used ones."""
+
+        self._memory[key] = stream_moments
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
@@ -0,0 +1,339 @@
+"""
+A command-line interface for the Monte Carlo integration engine.
+
+The integrand is given as a NumPy expression of `x`, for example
+`"sqrt(1 - x**2)"`. For d-dimensional limits `x` is an Nxd matrix, so the
+coordinates are `x[:, 0]`, `x[:, 1]`... Results are printed as JSON lines or as
+CSV. Many integrations can be listed in a jobs file, one JSON object per line
+with the same keys as the options, and they all run within a single process.
+Run `python cli.py --help` for the available options.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
+from cache import ResultCache
+from main import METHODS, SAMPLERS, montecarlo_integral
+
+# Names available to the expressions, besides the variable `x`
+NAMESPACE = {
+    "np": np,
+    "pi": np.pi,
+    "e": np.e,
+    **{
+        name: getattr(np, name)
+        for name in (
+            "abs",
+            "arccos",
+            "arcsin",
+            "arctan",
+            "cos",
+            "cosh",
+            "exp",
+            "log",
+            "log10",
+            "maximum",
+            "minimum",
+            "prod",
+            "sin",
+            "sinh",
+            "sqrt",
+            "sum",
+            "tan",
+            "tanh",
+            "where",
+        )
+    },
+}
+
+# Fields of each output record, in order
+FIELDS = (
+    "expression",
+    "limits",
+    "method",
+    "sampler",
+    "seed",
+    "workers",
+    "N_points",
+    "I_val",
+    "std_error",
+    "variance",
+    "elapsed_time",
+)
+
+
+class Integrand:
+    """A function given by a NumPy expression of `x`.
+
+    Instances can be sent to worker processes, since only the expression is
+    pickled, and their representation is the expression itself, so cached
+    results are found again by later runs.
+
+    Parameters
+    ----------
+    expression: str
+        Expression to be evaluated, for example `"sqrt(1 - x**2)"`.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        try:
+            self._code = compile(expression, "<integrand>", "eval")
+        except SyntaxError as error:
+            raise ValueError(f"Provided {expression = } is not valid.") from error
+
+    def __call__(self, x):
+        # Constant expressions still need one value per point
+        f_x = eval(self._code, {"__builtins__": {}, **NAMESPACE}, {"x": x})
+        return np.broadcast_to(f_x, np.shape(x)[:1]) if np.ndim(f_x) == 0 else f_x
+
+    def __getstate__(self):
+        return self.expression
+
+    def __setstate__(self, expression):
+        self.__init__(expression)
+
+    def __repr__(self):
+        return f"Integrand({self.expression!r})"
+
+
+def run_job(
+    expression,
+    limits=((0, 1),),
+    N_points=1e5,
+    method="hit-or-miss",
+    sampler="pseudo-random",
+    seed=None,
+    workers=None,
+    chunk_size=None,
+    control=None,
+    envelope=None,
+    plot=None,
+    cache=None,
+):
+    """Integrates an expression and returns the result as a record.
+
+    Parameters
+    ----------
+    expression: str
+        NumPy expression of `x` to be integrated.
+    limits: list
+        One (a, b) pair per dimension.
+    N_points: int
+        Number of points.
+    method: str
+        Estimator to be used, one of `METHODS`.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+    seed: int
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    control: tuple
+        An (expression, value) pair with the control function and the exact
+        value of its integral. Only used by "control-variate".
+    envelope: int
+        Number of segments of the hit-or-miss envelope.
+    plot: str
+        Path of an image showing the function and a sample of the points. Only
+        available for the one-dimensional hit-or-miss method.
+    cache: ~cache.ResultCache
+        Cache holding the statistics of previous integrations.
+
+    Returns
+    -------
+    record: dict
+        The options of the job together with its result, see `FIELDS`.
+    """
+
+    f_at_x = Integrand(expression)
+    limits = np.array(limits, dtype=float).reshape(-1, 2)
+    if control is not None:
+        control_expression, control_value = control
+        control = (Integrand(control_expression), float(control_value))
+    if plot is not None and (method != "hit-or-miss" or len(limits) > 1):
+        raise ValueError("Plots are only available for 1D hit-or-miss jobs.")
+
+    result = montecarlo_integral(
+        f_at_x,
+        limits[0] if len(limits) == 1 else limits,
+        N_points=N_points,
+        dense_output=False if plot is None else "reservoir",
+        chunk_size=chunk_size,
+        seed=seed,
+        workers=workers,
+        method=method,
+        control=control,
+        full_output=True,
+        sampler=sampler,
+        envelope=envelope,
+        cache=None if plot is not None else cache,
+    )
+    if plot is not None:
+        result, inside_points, outside_points = result
+        _save_plot(plot, f_at_x, limits[0], inside_points, outside_points)
+
+    return {
+        "expression": expression,
+        "limits": limits.tolist(),
+        "method": method,
+        "sampler": sampler,
+        "seed": seed,
+        "workers": workers,
+        "N_points": result.N_points,
+        "I_val": result.I_val,
+        "std_error": result.std_error,
+        "variance": result.variance,
+        "elapsed_time": result.elapsed_time,
+    }
+
+
+def _save_plot(path, f_at_x, limits, inside_points, outside_points):
+    """Draws the function and the sampled points into an image file."""
+
+    # Plotting is only paid for when asked and never needs a display
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from main import plot_density, plot_function
+
+    fig, ax = plt.subplots()
+    plot_density([inside_points, outside_points], ax=ax)
+    plot_function(f_at_x, limits, ax=ax, color="k")
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def read_jobs(jobs_file, defaults):
+    """Reads the jobs listed in a file, one JSON object per line.
+
+    Parameters
+    ----------
+    jobs_file: file
+        An open text file. Empty lines and lines starting by "#" are skipped.
+    defaults: dict
+        Options used by the jobs which do not set them.
+
+    Returns
+    -------
+    jobs: list
+        Keyword arguments of `run_job` for each one of the jobs.
+    """
+
+    jobs = []
+    for line_number, line in enumerate(jobs_file, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError(f"Job in line {line_number} is not a JSON object.")
+        unknown = set(job) - set(defaults)
+        if unknown:
+            raise ValueError(
+                f"Job in line {line_number} has unknown {sorted(unknown)}."
+            )
+        job = {**defaults, **job}
+        if job["expression"] is None:
+            raise ValueError(f"Job in line {line_number} has no expression.")
+        jobs.append(job)
+    return jobs
+
+
+def write_records(records, output_file, output_format):
+    """Writes the records either as JSON lines or as CSV.
+
+    Parameters
+    ----------
+    records: list
+        The results of the jobs, see `FIELDS`.
+    output_file: file
+        An open text file.
+    output_format: str
+        Either "json" or "csv".
+    """
+
+    if output_format == "json":
+        for record in records:
+            output_file.write(json.dumps(record) + "\n")
+        return
+
+    writer = csv.DictWriter(output_file, fieldnames=FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow({**record, "limits": json.dumps(record["limits"])})
+
+
+def main(argv=None):
+    """Entry point of the script."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("expression", nargs="?", help="NumPy expression of x")
+    parser.add_argument(
+        "--limits",
+        nargs=2,
+        type=float,
+        action="append",
+        metavar=("A", "B"),
+        help="limits of one dimension, repeat for more dimensions",
+    )
+    parser.add_argument("--N-points", type=float, default=1e5)
+    parser.add_argument("--method", choices=METHODS, default="hit-or-miss")
+    parser.add_argument("--sampler", choices=SAMPLERS, default="pseudo-random")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--chunk-size", type=int)
+    parser.add_argument("--control", nargs=2, metavar=("EXPRESSION", "VALUE"))
+    parser.add_argument("--envelope", type=int)
+    parser.add_argument("--plot", metavar="FILE", help="image of the points")
+    parser.add_argument("--jobs", metavar="FILE", help="JSON lines, one per job")
+    parser.add_argument("--cache", metavar="DIR", help="directory of the cache")
+    parser.add_argument("--format", choices=("json", "csv"), default="json")
+    parser.add_argument("--output", metavar="FILE", help="defaults to stdout")
+    args = parser.parse_args(argv)
+
+    if (args.expression is None) == (args.jobs is None):
+        parser.error("Provide either an expression or a jobs file.")
+
+    defaults = dict(
+        expression=args.expression,
+        limits=args.limits or [(0, 1)],
+        N_points=args.N_points,
+        method=args.method,
+        sampler=args.sampler,
+        seed=args.seed,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        control=args.control,
+        envelope=args.envelope,
+        plot=args.plot,
+    )
+    cache = None if args.cache is None else ResultCache(args.cache)
+
+    try:
+        if args.jobs is None:
+            jobs = [defaults]
+        else:
+            with open(args.jobs) as jobs_file:
+                jobs = read_jobs(jobs_file, defaults)
+        records = [run_job(**job, cache=cache) for job in jobs]
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"{parser.prog}: error: {error}\n")
+
+    if args.output is None:
+        write_records(records, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as output_file:
+            write_records(records, output_file, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,2684 @@
 """
-A program for solving one-dimensional integrals via Monte Carlo method.
+A program for solving integrals via Monte Carlo method.
 """
 
-import matplotlib.pyplot as plt
+import os
+import tempfile
+import time
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, islice, product, zip_longest
+from statistics import NormalDist
+
 import numpy as np
 
+# Points are generated by independent random streams holding this amount of
+# points each. Because the streams do not depend on the number of workers, the
+# same seed always produces the very same points.
+STREAM_SIZE = 2 ** 20
+
+
+def f_at_x(x):
+    """The function to be integrated.
+
+    Parameters
+    ---------
+    x: float
+        The independent variable.
+
+    Returns
+    -------
+    f_x: float
+        The value of the function evaluated at given point.
+    """
+
+    # Do you recognize this function?
+    f_x = np.sqrt(1 - x ** 2)
+
+    # TODO: What happens if the functions is...?
+    # f_x = np.sqrt(1 - x ** 2) * x ** 2
+    return f_x
+
+
+@dataclass
+class MonteCarloProfile:
+    """Breakdown of the work done by a Monte Carlo integration.
+
+    Parameters
+    ----------
+    setup_time: float
+        Seconds spent checking the options and preparing the estimator, e.g.
+        building the rectangle or the envelope.
+    random_time: float
+        Seconds spent generating random points and mapping them into the
+        integration domain.
+    evaluation_time: float
+        Seconds spent evaluating the function to be integrated.
+    reduction_time: float
+        Seconds spent comparing values and updating the statistics.
+    N_streams: int
+        Number of random streams.
+    N_samples: int
+        Number of independent samples of the estimator.
+    N_points: int
+        Number of points at which the function was evaluated.
+
+    Notes
+    -----
+    Times of the random, evaluation and reduction phases are added over all
+    the workers, so they may exceed the elapsed time of a parallel run.
+    """
+
+    setup_time: float = 0.0
+    random_time: float = 0.0
+    evaluation_time: float = 0.0
+    reduction_time: float = 0.0
+    N_streams: int = 0
+    N_samples: int = 0
+    N_points: int = 0
+
+
+@dataclass
+class MonteCarloProgress:
+    """Running state of a Monte Carlo integration, reported after each batch.
+
+    Parameters
+    ----------
+    I_val: float
+        The value for the integral estimated with the points used so far.
+    std_error: float
+        Standard error of the running estimate.
+    N_points: int
+        Number of points used so far.
+    N_points_total: int
+        Number of points to be used by the whole computation.
+    elapsed_time: float
+        Wall time, in seconds, since the computation started.
+    """
+
+    I_val: float
+    std_error: float
+    N_points: int
+    N_points_total: int
+    elapsed_time: float
+
+
+@dataclass
+class MonteCarloResult:
+    """Outcome of a Monte Carlo integration.
+
+    Parameters
+    ----------
+    I_val: float
+        The value for the integral (a.k.a. area under the curve).
+    std_error: float
+        Standard error of the estimated value.
+    N_points: int
+        Number of points used for computing the integral.
+    elapsed_time: float
+        Wall time, in seconds, spent in the computation.
+    converged: boolean
+        If `True`, the requested tolerance was reached before running out of
+        points or time.
+    variance: float
+        Variance of the estimator times the number of points. It allows to
+        compare methods: the lower, the fewer points for the same error.
+    method: str
+        Name of the estimator used for computing the integral.
+    grid: ~np.ndarray
+        Edges of the bins learned by the VEGAS method, if used.
+    profile: MonteCarloProfile
+        Timings of each phase and counters, if instrumentation was enabled.
+    """
+
+    I_val: float
+    std_error: float
+    N_points: int
+    elapsed_time: float
+    converged: bool = True
+    variance: float = np.nan
+    method: str = "hit-or-miss"
+    grid: np.ndarray = None
+    profile: MonteCarloProfile = None
+
+
+# Number of segments of the grid bounding the curve in one dimension
+N_GRID = 1024
+
+# Estimators available for computing the integral
+METHODS = ("hit-or-miss", "sample-mean", "antithetic", "control-variate", "stratified")
+
+# Generators of points in the unit hypercube and their randomization methods
+SAMPLERS = ("pseudo-random", "sobol", "halton")
+SCRAMBLES = ("owen", "shift")
+
+# Ways of capturing the inside and outside points
+DENSE_OUTPUTS = (False, True, "reservoir", "memmap")
+
+
+def _merge_moments(moments_a, moments_b):
+    """Combines the running statistics of two independent sets of samples.
+
+    Parameters
+    ----------
+    moments_a: tuple
+        Number of samples, mean vector and matrix of sums of squared deviations
+        (a.k.a. co-moments) of the first set. If only the diagonal of the
+        matrix is given, values are treated as independent ones.
+    moments_b: tuple
+        Number of samples, mean vector and matrix of co-moments of the second
+        set.
+
+    Returns
+    -------
+    moments: tuple
+        Number of samples, mean vector and matrix of co-moments of both sets.
+
+    Notes
+    -----
+    This is the parallel version of Welford's algorithm, which avoids the
+    catastrophic cancellation of the naive sum of squares formula.
+    """
+
+    (N_a, mean_a, M2_a), (N_b, mean_b, M2_b) = moments_a, moments_b
+    if N_a == 0 or N_b == 0:
+        return moments_b if N_a == 0 else moments_a
+
+    N = N_a + N_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (N_b / N)
+    delta_squared = np.outer(delta, delta) if np.ndim(M2_a) == 2 else delta ** 2
+    M2 = M2_a + M2_b + delta_squared * (N_a * N_b / N)
+    return N, mean, M2
+
+
+def _empty_moments(N_values=1):
+    """Returns the running statistics of an empty set of samples.
+
+    Parameters
+    ----------
+    N_values: int
+        Number of values computed for each sample.
+
+    Returns
+    -------
+    moments: tuple
+        Number of samples, mean vector and matrix of co-moments.
+    """
+
+    return 0, np.zeros(N_values), np.zeros((N_values, N_values))
+
+
+def _parse_limits(limits):
+    """Returns the lower and upper limits of integration for each dimension.
+
+    Parameters
+    ----------
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration, either a (a, b) tuple or a (d, 2)
+        matrix holding one row per dimension.
+
+    Returns
+    -------
+    lower: ~np.ndarray
+        Lower limits of integration.
+    upper: ~np.ndarray
+        Upper limits of integration.
+    one_dimensional: boolean
+        If `True`, limits were given as a (a, b) tuple and the function to be
+        integrated expects one-dimensional arrays.
+    """
+
+    one_dimensional = np.ndim(limits) == 1
+    lower, upper = np.asarray(limits, dtype=float).reshape(-1, 2).T
+
+    # Provided limits must have different values and in increasing order
+    try:
+        assert np.all(lower < upper)
+    except AssertionError:
+        raise ValueError(f"Provided {limits = } are not valid ones.")
+
+    return lower, upper, one_dimensional
+
+
+def _evaluate(f_at_x, x, one_dimensional):
+    """Evaluates the function at a block of points.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    x: ~np.ndarray
+        An Nxd matrix holding the coordinates of the points.
+    one_dimensional: boolean
+        If `True`, the function receives an array of N values instead.
+
+    Returns
+    -------
+    f_x: ~np.ndarray
+        The value of the function at each one of the points.
+    """
+
+    return f_at_x(x[:, 0] if one_dimensional else x)
+
+
+def _sampled_maximum(
+    f_at_x, lower, upper, one_dimensional, N_samples=1024, N_rounds=10
+):
+    """Returns the highest value of the function found by a zooming random search.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    lower: ~np.ndarray
+        Lower limits of integration.
+    upper: ~np.ndarray
+        Upper limits of integration.
+    one_dimensional: boolean
+        If `True`, the function expects one-dimensional arrays.
+    N_samples: int
+        Number of points evaluated in each round.
+    N_rounds: int
+        Number of rounds. Each one samples a box half as wide as the previous
+        one, centered at the best point found so far.
+
+    Returns
+    -------
+    f_max: float
+        The highest value of the function among all the evaluated points.
+
+    Notes
+    -----
+    The first round samples the whole domain, together with its corners and
+    its center. The search uses its own fixed seed, so it neither depends on
+    nor consumes the random streams of the integration.
+    """
+
+    rng = np.random.default_rng(0)
+    corners = lower + (upper - lower) * np.array(
+        list(product([0, 1], repeat=len(lower)))
+    )
+    best_point = (lower + upper) / 2
+    f_max = np.max(_evaluate(f_at_x, np.vstack((corners, best_point)), one_dimensional))
+
+    half_sides = (upper - lower) / 2
+    for _ in range(N_rounds):
+        points = best_point + half_sides * rng.uniform(-1, 1, (N_samples, len(lower)))
+        np.clip(points, lower, upper, out=points)
+        f_at_points = _evaluate(f_at_x, points, one_dimensional)
+        if np.shape(f_at_points) != (N_samples,):
+            raise ValueError(
+                f"Provided f_at_x returned an array of shape {np.shape(f_at_points)}"
+                f" for {N_samples} points, instead of one value per point."
+            )
+        i_max = np.argmax(f_at_points)
+        if f_at_points[i_max] > f_max:
+            f_max, best_point = f_at_points[i_max], points[i_max]
+        half_sides /= 2
+
+    return f_max
+
+
+def _bounding_rectangle(f_at_x, lower, upper, one_dimensional, margin=0.05):
+    """Returns the rectangle enclosing the curve within given limits.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    lower: ~np.ndarray
+        Lower limits of integration.
+    upper: ~np.ndarray
+        Upper limits of integration.
+    one_dimensional: boolean
+        If `True`, the function expects one-dimensional arrays.
+    margin: float
+        Safety margin added to the height of the rectangle, as a fraction of
+        the highest value found for the function.
+
+    Returns
+    -------
+    rectangle_origin: ~np.ndarray
+        Lower left corner of the rectangle.
+    rectangle_sides: ~np.ndarray
+        Base and height of the rectangle.
+
+    Notes
+    -----
+    In one dimension, the height of the rectangle is the highest value of the
+    function within a grid of `N_GRID + 1` points plus the margin. Using only
+    its values at 'a' and 'b' is wrong for every function whose maximum lies
+    inside [a, b]: the top of the curve is cut and the integral is silently
+    underestimated.
+
+    In more than one dimension, the rectangle becomes a box whose base is the
+    integration domain. Its height is the highest value of the function found
+    by `_sampled_maximum` plus the margin, since the corners of the domain
+    say nothing about the values inside it. Peaks narrower than the search
+    may still be cut, which `_hit_or_miss_streams` warns about.
+    """
+
+    if len(lower) == 1:
+        # Evaluate function value at a fine grid between the lower and upper
+        # limits 'a' and 'b', not only at them, so maxima inside are enclosed
+        x_grid = np.linspace(lower, upper, N_GRID + 1)
+        f_max = np.max(_evaluate(f_at_x, x_grid, one_dimensional))
+    else:
+        f_max = _sampled_maximum(f_at_x, lower, upper, one_dimensional)
+    rectangle_height = f_max + margin * abs(f_max)
+
+    # Compute the base and height of the rectangle and collect those inside the
+    # same matrix.
+    rectangle_sides = np.append(upper - lower, rectangle_height)
+    rectangle_origin = np.append(lower, 0)
+
+    return rectangle_origin, rectangle_sides
+
+
+def _check_positive(**kwargs):
+    """Converts given values into integers and checks all of them are positive.
+
+    Parameters
+    ----------
+    **kwargs: dict
+        Name and value of the parameters to be checked.
+
+    Returns
+    -------
+    values: list
+        The values converted into integers.
+    """
+
+    values = [int(value) for value in kwargs.values()]
+    for name, value in zip(kwargs, values):
+        if value < 1:
+            raise ValueError(f"Provided {name} = {value} must be a positive integer.")
+    return values
+
+
+def _make_streams(seed, N_points, stream_size=STREAM_SIZE, first_stream=0):
+    """Splits the points into independent random streams.
+
+    Parameters
+    ----------
+    seed: ~np.random.SeedSequence
+        Root seed sequence for all the streams.
+    N_points: int
+        Number of points to be split.
+    stream_size: int
+        Maximum number of points in each stream.
+    first_stream: int
+        Index of the first stream.
+
+    Returns
+    -------
+    streams: list
+        A list of (seed_sequence, N_points) tuples, one per random stream.
+
+    Notes
+    -----
+    The i-th stream is the i-th child of the root seed sequence, no matter
+    which worker computes it.
+    """
+
+    return [
+        (
+            np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,)),
+            min(stream_size, N_points - first_point),
+        )
+        for i, first_point in enumerate(
+            range(0, N_points, stream_size), start=first_stream
+        )
+    ]
+
+
+def _map_streams(kernel, streams, kernel_args, executor=None, workers=1):
+    """Runs a kernel over a collection of streams, maybe in several processes.
+
+    Parameters
+    ----------
+    kernel: function
+        A function accepting a list of streams followed by `kernel_args` and
+        returning a list with one result per stream.
+    streams: list
+        A list of (seed_sequence, N_points) tuples, one per random stream.
+    kernel_args: tuple
+        Additional positional arguments for the kernel.
+    executor: ~concurrent.futures.Executor
+        Pool of processes. If `None`, streams are computed in this process.
+    workers: int
+        Number of groups in which streams are split.
+
+    Returns
+    -------
+    stream_results: list
+        The results of the kernel, in the original order of the streams.
+    """
+
+    if not streams:
+        return []
+    elif executor is None:
+        return kernel(streams, *kernel_args)
+
+    # Each worker receives a contiguous group of streams
+    group_bounds = np.linspace(0, len(streams), workers + 1).astype(int)
+    futures = [
+        executor.submit(kernel, streams[first:last], *kernel_args)
+        for first, last in zip(group_bounds[:-1], group_bounds[1:])
+        if first < last
+    ]
+    return [result for future in futures for result in future.result()]
+
+
+def _iter_streams(kernel, streams, kernel_args, executor=None, workers=1):
+    """Runs a kernel over a collection of streams, yielding the result of each
+    stream as soon as it and all the previous ones are available.
+
+    Parameters
+    ----------
+    kernel: function
+        A function accepting a list of streams followed by `kernel_args` and
+        returning a list with one result per stream.
+    streams: list
+        A list of (seed_sequence, N_points) tuples, one per random stream.
+    kernel_args: tuple
+        Additional positional arguments for the kernel.
+    executor: ~concurrent.futures.Executor
+        Pool of processes. If `None`, streams are computed in this process.
+    workers: int
+        Number of processes of the pool. Up to twice this number of streams
+        are computed ahead of the caller.
+
+    Yields
+    ------
+    stream_result: tuple
+        The result of the kernel for each stream, in the original order.
+    """
+
+    if executor is None:
+        for stream in streams:
+            yield from kernel([stream], *kernel_args)
+        return
+
+    # Streams are submitted one by one, so results arrive with the finest
+    # granularity. Only a few of them are in flight at once, so finished ones
+    # do not pile up in memory while the caller is busy. Pending ones are
+    # dropped if the caller stops iterating.
+    streams = iter(streams)
+    futures = deque(
+        executor.submit(kernel, [stream], *kernel_args)
+        for stream in islice(streams, 2 * workers)
+    )
+    try:
+        while futures:
+            stream_results = futures.popleft().result()
+            for stream in islice(streams, 1):
+                futures.append(executor.submit(kernel, [stream], *kernel_args))
+            yield from stream_results
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _affine_columns(points, origin, sides, out=None):
+    """Scales and shifts each column of a matrix of points.
+
+    Parameters
+    ----------
+    points: ~np.ndarray
+        An NxM matrix of points.
+    origin: ~np.ndarray
+        Value added to each one of the M columns.
+    sides: ~np.ndarray
+        Factor multiplying each one of the M columns.
+    out: ~np.ndarray
+        Matrix for storing the result. If `None`, points are modified in-place.
+
+    Returns
+    -------
+    out: ~np.ndarray
+        The matrix holding the transformed points.
+
+    Notes
+    -----
+    Broadcasting an NxM matrix against M values runs an inner loop of only M
+    iterations for each row. Working column by column runs a single loop of N
+    iterations instead, which is several times faster for small M.
+    """
+
+    out = points if out is None else out
+    for column, out_column, column_origin, column_side in zip(
+        points.T, out.T, origin, sides
+    ):
+        np.multiply(column, column_side, out=out_column)
+        out_column += column_origin
+    return out
+
+
+def _uniform_source(
+    seed_sequence, N_draws, sampler, scramble, dtype=np.float64, skip=0
+):
+    """Returns a function filling arrays with points in the unit hypercube.
+
+    Parameters
+    ----------
+    seed_sequence: ~np.random.SeedSequence
+        Seed of the random stream.
+    N_draws: int
+        Dimension of the hypercube, i.e. number of columns of the arrays.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+    scramble: str
+        Randomization of the low-discrepancy sequences, one of `SCRAMBLES`.
+    dtype: ~np.dtype
+        Floating point type of the arrays to be filled.
+    skip: int
+        Number of points of the stream to be skipped, e.g. because they were
+        already used by a previous computation.
+
+    Returns
+    -------
+    fill_uniforms: function
+        A function accepting an array and filling it with the next points.
+    """
+
+    rng = np.random.default_rng(seed_sequence)
+    if sampler == "pseudo-random":
+        # Each double precision value consumes one output of 64 bits, while
+        # single precision ones consume halves of it
+        N_skipped = skip * N_draws
+        if np.dtype(dtype) == np.float64:
+            rng.bit_generator.advance(N_skipped)
+        else:
+            rng.bit_generator.advance(N_skipped // 2)
+            if N_skipped % 2:
+                rng.random(dtype=np.float32)
+        return lambda out: rng.random(out=out, dtype=out.dtype.type)
+
+    # Low-discrepancy sequences are an optional feature relying on SciPy
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError(f"The {sampler = } requires SciPy to be installed.")
+
+    # Owen-type scrambling is done by SciPy itself. Otherwise, the deterministic
+    # sequence is randomized by shifting all the points the same random amount.
+    engine_class = qmc.Sobol if sampler == "sobol" else qmc.Halton
+    engine = engine_class(N_draws, scramble=(scramble == "owen"), seed=rng)
+    shift = rng.random(N_draws) if scramble == "shift" else None
+    if skip > 0:
+        engine.fast_forward(skip)
+
+    def fill_uniforms(out):
+        out[...] = engine.random(len(out))
+        if shift is not None:
+            out += shift
+            np.remainder(out, 1, out=out)
+        return out
+
+    return fill_uniforms
+
+
+def _piecewise_envelope(f_at_x, a, b, N_segments, margin):
+    """Returns a piecewise-constant function lying above the curve.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    a: float
+        Lower limit of integration.
+    b: float
+        Upper limit of integration.
+    N_segments: int
+        Number of equal segments in which [a, b] is split.
+    margin: float
+        Safety margin added to the height of each segment, as a fraction of the
+        highest value of the function.
+
+    Returns
+    -------
+    envelope: tuple
+        The edges of the segments, their heights and the cumulative sum of
+        their areas.
+
+    Notes
+    -----
+    The height of each segment is the highest value of the function within a
+    grid of points inside the segment plus the margin. Functions varying
+    faster than the grid may not be fully enclosed, so increase the number of
+    segments or the margin for them.
+    """
+
+    # Evaluate the function at a fine grid holding several points per segment
+    N_grid = 8
+    x_grid = np.linspace(a, b, N_segments * N_grid + 1)
+    f_at_grid = f_at_x(x_grid)
+
+    # Each segment shares its edges with its neighbours
+    f_at_segments = np.lib.stride_tricks.sliding_window_view(f_at_grid, N_grid + 1)
+    segments_height = f_at_segments[::N_grid].max(axis=1)
+    segments_height = np.maximum(segments_height + margin * f_at_grid.max(), 0)
+
+    segments_edges = x_grid[::N_grid]
+    cumulative_area = np.cumsum(segments_height * np.diff(segments_edges))
+    return segments_edges, segments_height, cumulative_area
+
+
+def _map_to_envelope(random_points, envelope):
+    """Maps random points in the unit square into the region below an envelope.
+
+    Parameters
+    ----------
+    random_points: ~np.ndarray
+        An Nx2 matrix with random values in [0, 1). It is modified in-place.
+    envelope: tuple
+        The edges of the segments, their heights and the cumulative sum of
+        their areas.
+
+    Notes
+    -----
+    The first coordinate chooses a point of the area below the envelope, so
+    each segment receives a number of points proportional to its area. The
+    second coordinate chooses a height within the segment.
+    """
+
+    segments_edges, segments_height, cumulative_area = envelope
+    rand_area = random_points[:, 0] * cumulative_area[-1]
+    segment = np.searchsorted(cumulative_area, rand_area, side="right")
+    np.minimum(segment, len(cumulative_area) - 1, out=segment)
+
+    # Locate the x-coordinate inside the segment and scale the y-coordinate
+    segment_height = segments_height[segment]
+    area_before_segment = (
+        cumulative_area[segment] - segment_height * np.diff(segments_edges)[segment]
+    )
+    random_points[:, 0] = segments_edges[segment]
+    random_points[:, 0] += (rand_area - area_before_segment) / segment_height
+    random_points[:, 1] *= segment_height
+
+
+def _update_reservoir(reservoir, points, keys, is_selected, size):
+    """Keeps the points holding the smallest random keys.
+
+    Parameters
+    ----------
+    reservoir: ~np.ndarray
+        A matrix of points whose last column holds their keys.
+    points: ~np.ndarray
+        A matrix of new points.
+    keys: ~np.ndarray
+        Random key of each one of the new points.
+    is_selected: ~np.ndarray
+        Boolean mask telling which new points are candidates.
+    size: int
+        Maximum number of points in the reservoir.
+
+    Returns
+    -------
+    reservoir: ~np.ndarray
+        The updated matrix of points and keys.
+
+    Notes
+    -----
+    Keys are independent uniform values, so the points with the smallest ones
+    are a uniform sample of all the candidates. Reservoirs filled by different
+    streams or workers are merged just by keeping the smallest keys again.
+    """
+
+    # Once the reservoir is full, only keys below its largest one can enter it
+    if len(reservoir) == size:
+        is_selected = is_selected & (keys < reservoir[:, -1].max())
+    candidates = np.column_stack([points[is_selected], keys[is_selected]])
+    reservoir = np.concatenate([reservoir, candidates])
+    if len(reservoir) > size:
+        reservoir = reservoir[np.argpartition(reservoir[:, -1], size - 1)[:size]]
+    return reservoir
+
+
+def _hit_or_miss_area(rectangle_sides, envelope):
+    """Returns the area of the region where hit-or-miss draws its points.
+
+    Parameters
+    ----------
+    rectangle_sides: ~np.ndarray
+        Base and height of the rectangle enclosing the curve.
+    envelope: tuple
+        Piecewise-constant function lying above the curve, or `None`.
+
+    Returns
+    -------
+    area: float
+        Area of the rectangle, or of the region below the envelope.
+    """
+
+    return np.prod(rectangle_sides) if envelope is None else envelope[-1][-1]
+
+
+def _hit_or_miss_moments(N_below_curve, N_points, area):
+    """Returns the statistics of hit-or-miss samples from their number of hits.
+
+    Parameters
+    ----------
+    N_below_curve: int
+        Number of points below the curve.
+    N_points: int
+        Number of points.
+    area: float
+        Area of the region where points are drawn.
+
+    Returns
+    -------
+    moments: tuple
+        Number of samples, mean vector and matrix of co-moments.
+
+    Notes
+    -----
+    Every point contributes with the area or with zero, so the statistics
+    follow from the number of hits. Computing them from integer counts gives
+    the same values no matter how the points were split.
+    """
+
+    hit_ratio = N_below_curve / N_points
+    return (
+        N_points,
+        np.array([area * hit_ratio]),
+        np.array([[area ** 2 * N_points * hit_ratio * (1 - hit_ratio)]]),
+    )
+
+
+def _hit_or_miss_streams(
+    streams,
+    f_at_x,
+    rectangle_origin,
+    rectangle_sides,
+    one_dimensional,
+    envelope,
+    chunk_size,
+    dense_output,
+    sampler="pseudo-random",
+    scramble=None,
+    dtype=np.float64,
+    profile=False,
+    skips=None,
+):
+    """Counts the random points below the curve for a collection of streams.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_points) tuples, one per random stream.
+    f_at_x: function
+        Name of the function to be integrated.
+    rectangle_origin: ~np.ndarray
+        Lower left corner of the rectangle enclosing the curve.
+    rectangle_sides: ~np.ndarray
+        Base and height of the rectangle enclosing the curve.
+    one_dimensional: boolean
+        If `True`, the function expects one-dimensional arrays.
+    envelope: tuple
+        Piecewise-constant function lying above the curve. If `None`, points
+        are drawn within the rectangle.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    dense_output: boolean or tuple
+        If `True` inside and outside points are returned. A ("reservoir", size)
+        tuple keeps only the points with the smallest random keys, while a
+        ("memmap", path, offsets, final_path) tuple writes the points of each
+        stream into the rows of the file starting at the offset of the stream.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+    scramble: str
+        Randomization of the low-discrepancy sequences, one of `SCRAMBLES`.
+    dtype: ~np.dtype
+        Floating point type of the random points.
+    profile: boolean
+        If `True`, the time spent in each phase is measured.
+    skips: dict
+        Number of leading points to be skipped in some of the streams, keyed
+        by the spawn key of their seed sequence.
+
+    Returns
+    -------
+    stream_results: list
+        A list with the running statistics, the inside and outside points if
+        requested and the timings if profiled for each one of the streams.
+        Reservoirs hold the random keys in an additional column. Memory-mapped
+        points are returned as the (start, stop) rows they fill in the file.
+    """
+
+    # Points and boolean mask are allocated once and reused by every block
+    chunk_size = min(chunk_size, max(N_points for _, N_points in streams))
+    if sampler == "sobol":
+        chunk_size = 1 << (chunk_size.bit_length() - 1)
+    points_buffer = np.empty((chunk_size, len(rectangle_sides)), dtype=dtype)
+    is_below_curve_buffer = np.empty(chunk_size, dtype=bool)
+    rectangle_area = _hit_or_miss_area(rectangle_sides, envelope)
+
+    # Keep the rectangle in the same type of the points, so all the arithmetic
+    # is done in that type
+    rectangle_origin = rectangle_origin.astype(dtype)
+    rectangle_sides = rectangle_sides.astype(dtype)
+    rectangle_top = rectangle_origin[-1] + rectangle_sides[-1]
+
+    # The clock is only read if asked for, so an unprofiled run pays nothing
+    clock = time.perf_counter if profile else lambda: 0.0
+
+    # Bounded dense output either samples the points or spills them to disk
+    capture = dense_output[0] if isinstance(dense_output, tuple) else dense_output
+    if capture == "reservoir":
+        _, reservoir_size = dense_output
+    elif capture == "memmap":
+        _, dense_path, stream_offsets, _ = dense_output
+        header_size = np.load(dense_path, mmap_mode="r").offset
+        row_size = len(rectangle_sides) * np.dtype(dtype).itemsize
+        dense_file = open(dense_path, "r+b")
+
+    stream_results = []
+    for seed_sequence, N_points in streams:
+        fill_uniforms = _uniform_source(
+            seed_sequence,
+            len(rectangle_sides),
+            sampler,
+            scramble,
+            dtype,
+            skip=(skips or {}).get(seed_sequence.spawn_key, 0),
+        )
+        N_below_curve = 0
+        below_points, above_points = [], []
+        timings = np.zeros(3)
+
+        # Keys of the reservoirs come from their own stream, so the points
+        # are the same ones no matter if they are captured or not. Inside
+        # points fill the region of the stream from its start and outside
+        # points from its end.
+        if capture == "reservoir":
+            key_rng = np.random.default_rng(
+                np.random.SeedSequence(
+                    seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (0,)
+                )
+            )
+            below_points = above_points = np.empty((0, len(rectangle_sides) + 1))
+        elif capture == "memmap":
+            first_below = stream_offsets[seed_sequence.spawn_key]
+            last_below, first_above = first_below, first_below + N_points
+
+        for first_point in range(0, N_points, chunk_size):
+            N_block = min(chunk_size, N_points - first_point)
+            tic = clock()
+
+            # Generate a collection of random x and y values, all of them
+            # located within the desired rectangle. Notice the random function
+            # generates values between [0, 1] whose purpose is to be used as
+            # scaling values. In addition, the value of 'a' limit needs to be
+            # added to the x-coordinates in order to shitf the location of this
+            # points. All operations are done in-place to avoid creating new
+            # matrices.
+            random_points = fill_uniforms(points_buffer[:N_block])
+            if envelope is None:
+                _affine_columns(random_points, rectangle_origin, rectangle_sides)
+            else:
+                _map_to_envelope(random_points, envelope)
+            rand_x, rand_f_at_x = random_points[:, :-1], random_points[:, -1]
+            toc = clock()
+            timings[0] += toc - tic
+
+            # Evaluate the function at previously randomly generated
+            # x-coordinates and compare randomly generated y-coordinates with
+            # computed ones
+            is_below_curve = is_below_curve_buffer[:N_block]
+            f_at_rand_x = _evaluate(f_at_x, rand_x, one_dimensional)
+            tic = clock()
+            timings[1] += tic - toc
+            np.less(rand_f_at_x, f_at_rand_x, out=is_below_curve)
+            if envelope is None and np.max(f_at_rand_x) > rectangle_top:
+                warnings.warn(
+                    "The function exceeds the rectangle enclosing it, so the "
+                    "integral is underestimated. Increase the envelope_margin.",
+                    RuntimeWarning,
+                )
+            N_block_below = np.count_nonzero(is_below_curve)
+            N_below_curve += N_block_below
+
+            # Points are only stored if the user asked for them
+            if capture is True:
+                below_points.append(random_points[is_below_curve])
+                above_points.append(random_points[~is_below_curve])
+            elif capture == "reservoir":
+                keys = key_rng.random(N_block)
+                below_points = _update_reservoir(
+                    below_points, random_points, keys, is_below_curve, reservoir_size
+                )
+                above_points = _update_reservoir(
+                    above_points, random_points, keys, ~is_below_curve, reservoir_size
+                )
+            elif capture == "memmap":
+                first_above -= N_block - N_block_below
+                dense_file.seek(header_size + last_below * row_size)
+                dense_file.write(random_points[is_below_curve].tobytes())
+                dense_file.seek(header_size + first_above * row_size)
+                dense_file.write(random_points[~is_below_curve].tobytes())
+                last_below += N_block_below
+            timings[2] += clock() - tic
+
+        if capture == "reservoir":
+            below_points, above_points = [below_points], [above_points]
+        elif capture == "memmap":
+            below_points = [(first_below, last_below)]
+            above_points = [(first_above, first_below + N_points)]
+
+        moments = _hit_or_miss_moments(N_below_curve, N_points, rectangle_area)
+        stream_results.append(
+            (moments, below_points, above_points, timings if profile else None)
+        )
+
+    if capture == "memmap":
+        dense_file.close()
+    return stream_results
+
+
+def _draws_per_sample(method, N_strata, N_dims=1):
+    """Returns the number of random values and function evaluations per sample.
+
+    Parameters
+    ----------
+    method: str
+        Name of the estimator.
+    N_strata: int
+        Number of sub-intervals used by the stratified estimator.
+    N_dims: int
+        Number of dimensions of the integration domain.
+
+    Returns
+    -------
+    N_draws: int
+        Amount of random values needed by each sample.
+    N_evaluations: int
+        Amount of function evaluations needed by each sample.
+    """
+
+    if method == "hit-or-miss":
+        return N_dims + 1, 1
+    elif method == "antithetic":
+        return N_dims, 2
+    elif method == "stratified":
+        return N_strata * N_dims, N_strata
+    return N_dims, 1
+
+
+def _sample_mean_streams(
+    streams,
+    f_at_x,
+    method,
+    lower,
+    upper,
+    one_dimensional,
+    control,
+    N_strata,
+    chunk_size,
+    dense_output,
+    sampler="pseudo-random",
+    scramble=None,
+    dtype=np.float64,
+    profile=False,
+    skips=None,
+):
+    """Computes the running statistics of the sample-mean family of estimators
+    for a collection of streams.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    f_at_x: function
+        Name of the function to be integrated.
+    method: str
+        Name of the estimator.
+    lower: ~np.ndarray
+        Lower limits of integration.
+    upper: ~np.ndarray
+        Upper limits of integration.
+    one_dimensional: boolean
+        If `True`, the function expects one-dimensional arrays.
+    control: tuple
+        Control function and the known value of its integral.
+    N_strata: int
+        Number of sub-intervals used by the stratified estimator.
+    chunk_size: int
+        Maximum number of random values drawn and evaluated at once.
+    dense_output: boolean
+        Unused. It is only accepted for having the same signature as the rest
+        of kernels.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+    scramble: str
+        Randomization of the low-discrepancy sequences, one of `SCRAMBLES`.
+    dtype: ~np.dtype
+        Floating point type of the random points.
+    profile: boolean
+        If `True`, the time spent in each phase is measured.
+    skips: dict
+        Number of leading samples to be skipped in some of the streams, keyed
+        by the spawn key of their seed sequence.
+
+    Returns
+    -------
+    stream_results: list
+        A list with the running statistics and the timings if profiled for
+        each one of the streams.
+
+    Notes
+    -----
+    Each sample is an independent estimate of the integral. Being V the volume
+    of the domain, which is (b - a) in one dimension:
+
+    * sample-mean: V * f(x).
+    * antithetic: V * (f(x) + f(a + b - x)) / 2.
+    * control-variate: V * f(x) and V * g(x). The optimal coefficient for g is
+      computed from the co-moments at the end.
+    * stratified: V / K * sum(f(x_k)), with one x_k in each one of the K equal
+      slices of the domain along its first dimension.
+    """
+
+    N_dims, domain_sides = len(lower), upper - lower
+    domain_volume = np.prod(domain_sides)
+    N_draws, _ = _draws_per_sample(method, N_strata, N_dims)
+    chunk_size = max(1, min(chunk_size // N_draws, max(N for _, N in streams)))
+    if sampler == "sobol":
+        chunk_size = 1 << (chunk_size.bit_length() - 1)
+    uniforms_buffer = np.empty((chunk_size, N_draws), dtype=dtype)
+    if method == "antithetic":
+        mirror_buffer = np.empty((chunk_size, N_dims), dtype=dtype)
+
+    # Stratified samples hold one point in each slice of the domain. Otherwise,
+    # a sample is made of a single point. Each column of the matrix of random
+    # values is mapped into its slice and dimension.
+    N_slices = N_strata if method == "stratified" else 1
+    slices_sides = domain_sides.copy()
+    slices_sides[0] /= N_slices
+    slices_origin = np.tile(lower, (N_slices, 1))
+    slices_origin[:, 0] += np.arange(N_slices) * slices_sides[0]
+    columns_origin = slices_origin.ravel().astype(dtype)
+    columns_sides = np.tile(slices_sides, N_slices).astype(dtype)
+    mirror_origin, mirror_sides = (lower + upper).astype(dtype), -np.ones(N_dims)
+
+    # The clock is only read if asked for, so an unprofiled run pays nothing
+    clock = time.perf_counter if profile else lambda: 0.0
+
+    stream_results = []
+    for seed_sequence, N_samples in streams:
+        fill_uniforms = _uniform_source(
+            seed_sequence,
+            N_draws,
+            sampler,
+            scramble,
+            dtype,
+            skip=(skips or {}).get(seed_sequence.spawn_key, 0),
+        )
+        moments = _empty_moments(2 if method == "control-variate" else 1)
+        timings = np.zeros(3)
+
+        for first_sample in range(0, N_samples, chunk_size):
+            N_block = min(chunk_size, N_samples - first_sample)
+            tic = clock()
+
+            # Map the random values into the integration domain. Points are
+            # stored as an Nx(K*d) matrix, viewed then as N*K points of d
+            # coordinates.
+            rand_x = fill_uniforms(uniforms_buffer[:N_block])
+            _affine_columns(rand_x, columns_origin, columns_sides)
+            rand_x = rand_x.reshape(-1, N_dims)
+            if method == "antithetic":
+                mirror_x = _affine_columns(
+                    rand_x, mirror_origin, mirror_sides, out=mirror_buffer[:N_block]
+                )
+            toc = clock()
+            timings[0] += toc - tic
+
+            # Evaluate the estimate provided by each sample. A single new
+            # matrix is created from the values of the function and all
+            # further operations are done in-place.
+            f_at_rand_x = _evaluate(f_at_x, rand_x, one_dimensional)
+            f_at_rand_x = f_at_rand_x.reshape(N_block, N_slices)
+            if method == "antithetic":
+                f_at_mirror_x = _evaluate(f_at_x, mirror_x, one_dimensional)
+                samples = np.add(f_at_rand_x, f_at_mirror_x.reshape(N_block, 1))
+                samples *= domain_volume / 2
+            elif method == "control-variate":
+                g_at_x, _ = control
+                g_at_rand_x = _evaluate(g_at_x, rand_x, one_dimensional)
+                samples = np.hstack([f_at_rand_x, g_at_rand_x.reshape(N_block, 1)])
+                samples *= domain_volume
+            elif method == "stratified":
+                samples = f_at_rand_x.mean(axis=1, keepdims=True)
+                samples *= domain_volume
+            else:
+                samples = np.multiply(f_at_rand_x, domain_volume)
+            tic = clock()
+            timings[1] += tic - toc
+
+            # Update the statistics of the stream with the ones of the block.
+            # These are always accumulated in double precision.
+            block_mean = samples.mean(axis=0, dtype=np.float64)
+            samples -= block_mean.astype(samples.dtype)
+            block_M2 = np.dot(samples.T, samples).astype(np.float64)
+            moments = _merge_moments(moments, (N_block, block_mean, block_M2))
+            timings[2] += clock() - tic
+
+        stream_results.append((moments, [], [], timings if profile else None))
+
+    return stream_results
+
+
+def _prepare_estimator(
+    f_at_x,
+    limits,
+    method,
+    control,
+    N_strata,
+    dense_output,
+    envelope=None,
+    envelope_margin=0.05,
+):
+    """Checks the options of an estimator and returns its kernel.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration, either a (a, b) tuple or a (d, 2)
+        matrix holding one row per dimension.
+    method: str
+        Name of the estimator.
+    control: tuple
+        Control function and the known value of its integral.
+    N_strata: int
+        Number of sub-intervals used by the stratified estimator.
+    dense_output: boolean
+        If `True` inside and outside points are returned.
+    envelope: int
+        Number of segments of the envelope used by the hit-or-miss estimator.
+        If `None`, the rectangle is used.
+    envelope_margin: float
+        Safety margin of the envelope or of the rectangle, as a fraction of
+        the highest value of the function.
+
+    Returns
+    -------
+    kernel: function
+        Function computing the statistics of a collection of streams.
+    kernel_args: tuple
+        Additional positional arguments for the kernel, except for the chunk
+        size and the dense output flag.
+    N_evaluations: int
+        Amount of function evaluations needed by each sample.
+    """
+
+    lower, upper, one_dimensional = _parse_limits(limits)
+
+    if method not in METHODS:
+        raise ValueError(f"Provided {method = } is not one of {METHODS}.")
+    if method == "control-variate" and control is None:
+        raise ValueError("The control-variate method requires a control.")
+    if dense_output is not False and method != "hit-or-miss":
+        raise ValueError("Only the hit-or-miss method provides dense output.")
+    (N_strata,) = _check_positive(N_strata=N_strata)
+
+    if envelope is not None and (method != "hit-or-miss" or len(lower) > 1):
+        raise ValueError("Envelopes are only available for 1D hit-or-miss.")
+
+    if method == "hit-or-miss":
+        kernel = _hit_or_miss_streams
+        rectangle = _bounding_rectangle(
+            f_at_x, lower, upper, one_dimensional, envelope_margin
+        )
+        if envelope is not None:
+            (envelope,) = _check_positive(envelope=envelope)
+            envelope = _piecewise_envelope(
+                f_at_x, lower[0], upper[0], envelope, envelope_margin
+            )
+        kernel_args = (f_at_x, *rectangle, one_dimensional, envelope)
+    else:
+        kernel = _sample_mean_streams
+        kernel_args = (f_at_x, method, lower, upper, one_dimensional, control, N_strata)
+
+    _, N_evaluations = _draws_per_sample(method, N_strata, len(lower))
+    return kernel, kernel_args, N_evaluations
+
+
+def _estimate_from_moments(moments, method, control):
+    """Computes the integral and its variance from the running statistics.
+
+    Parameters
+    ----------
+    moments: tuple
+        Number of samples, mean vector and matrix of co-moments.
+    method: str
+        Name of the estimator.
+    control: tuple
+        Control function and the known value of its integral.
+
+    Returns
+    -------
+    I_val: float
+        The value for the integral.
+    sample_variance: float
+        Variance of a single sample.
+    """
+
+    N, mean, M2 = moments
+    I_val, M2_val = mean[0], M2[0, 0]
+
+    # Substract the error of the control, scaled by the coefficient which
+    # minimizes the variance of the estimator
+    if method == "control-variate" and M2[1, 1] > 0:
+        _, G_val = control
+        coefficient = M2[0, 1] / M2[1, 1]
+        I_val = I_val - coefficient * (mean[1] - G_val)
+        M2_val = M2_val - coefficient * M2[0, 1]
+
+    sample_variance = M2_val / (N - 1) if N > 1 else np.inf
+    return float(I_val), float(sample_variance)
+
+
+def _reduce_stream_results(stream_results, method, control, sampler):
+    """Combines the statistics of all the streams into a single estimate.
+
+    Parameters
+    ----------
+    stream_results: list
+        A list with the running statistics for each one of the streams.
+    method: str
+        Name of the estimator.
+    control: tuple
+        Control function and the known value of its integral.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+
+    Returns
+    -------
+    I_val: float
+        The value for the integral.
+    std_error: float
+        Standard error of the estimated value.
+    N_samples: int
+        Number of samples used by the estimate.
+
+    Notes
+    -----
+    Points of a low-discrepancy sequence are not independent, so the error of
+    a quasi-Monte Carlo estimate comes from the spread of the estimates of the
+    randomized replicates, one per stream.
+    """
+
+    if sampler == "pseudo-random":
+        moments = _empty_moments()
+        for stream_moments, *_ in stream_results:
+            moments = _merge_moments(moments, stream_moments)
+        I_val, sample_variance = _estimate_from_moments(moments, method, control)
+        return I_val, float(np.sqrt(sample_variance / moments[0])), moments[0]
+
+    replicates = np.array(
+        [
+            _estimate_from_moments(stream_moments, method, control)[0]
+            for stream_moments, *_ in stream_results
+        ]
+    )
+    N_samples = sum(stream_moments[0] for stream_moments, *_ in stream_results)
+    std_error = (
+        replicates.std(ddof=1) / np.sqrt(len(replicates))
+        if len(replicates) > 1
+        else np.inf
+    )
+    return float(replicates.mean()), float(std_error), N_samples
+
+
+def _running_reduction(stream_results, method, control, sampler):
+    """Combines the statistics of the streams one at a time.
+
+    Parameters
+    ----------
+    stream_results: iterable
+        The running statistics for each one of the streams, in order.
+    method: str
+        Name of the estimator.
+    control: tuple
+        Control function and the known value of its integral.
+    sampler: str
+        Generator of points, one of `SAMPLERS`.
+
+    Yields
+    ------
+    stream_result: tuple
+        The statistics of the stream just combined.
+    I_val: float
+        The value for the integral using this and all the previous streams.
+    std_error: float
+        Standard error of the estimated value.
+    N_samples: int
+        Number of samples used by the estimate.
+    """
+
+    moments, replicates = _empty_moments(), []
+    for stream_result in stream_results:
+        # Merging the new stream only keeps the cost of each update constant.
+        # Replicates are few, so they are simply reduced again.
+        if sampler == "pseudo-random":
+            moments = _merge_moments(moments, stream_result[0])
+            I_val, sample_variance = _estimate_from_moments(moments, method, control)
+            std_error = float(np.sqrt(sample_variance / moments[0]))
+            yield stream_result, I_val, std_error, moments[0]
+        else:
+            replicates.append(stream_result)
+            yield (
+                stream_result,
+                *_reduce_stream_results(replicates, method, control, sampler),
+            )
+
+
+def _prepare_dense_output(dense_output, streams, limits, dense_size, dense_file, dtype):
+    """Translates the dense output option into the one understood by kernels.
+
+    Parameters
+    ----------
+    dense_output: boolean or str
+        Way of capturing the points, one of `DENSE_OUTPUTS`.
+    streams: list
+        A list of (seed_sequence, N_points) tuples, one per random stream.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration.
+    dense_size: int
+        Maximum number of inside and of outside points kept by a reservoir.
+    dense_file: str
+        Path of the file holding memory-mapped points. If `None`, a temporary
+        file is used.
+    dtype: ~np.dtype
+        Floating point type of the random points.
+
+    Returns
+    -------
+    dense_output: boolean or tuple
+        The option to be passed to the kernels.
+
+    Notes
+    -----
+    Memory-mapped points are first written into a scratch file, where each
+    stream owns the rows of its points. This allows several workers to write
+    at once without knowing in advance how many points fall below the curve.
+    """
+
+    if dense_output == "reservoir":
+        (dense_size,) = _check_positive(dense_size=dense_size)
+        return ("reservoir", dense_size)
+    elif dense_output != "memmap":
+        return dense_output
+
+    if dense_file is None:
+        file_descriptor, dense_file = tempfile.mkstemp(suffix=".npy")
+        os.close(file_descriptor)
+    stream_offsets, N_total = {}, 0
+    for seed_sequence, N_points in streams:
+        stream_offsets[seed_sequence.spawn_key] = N_total
+        N_total += N_points
+
+    # The scratch file is created here, so workers only open it
+    N_columns = len(_parse_limits(limits)[0]) + 1
+    scratch_file = f"{dense_file}.part"
+    np.lib.format.open_memmap(
+        scratch_file, mode="w+", dtype=dtype, shape=(N_total, N_columns)
+    ).flush()
+    return ("memmap", scratch_file, stream_offsets, str(dense_file))
+
+
+def _gather_dense_output(stream_results, dense_output, dtype):
+    """Combines the inside and outside points captured by all the streams.
+
+    Parameters
+    ----------
+    stream_results: list
+        The results of the hit-or-miss kernel for each one of the streams.
+    dense_output: boolean or tuple
+        The dense output option passed to the kernels.
+    dtype: ~np.dtype
+        Floating point type of the random points.
+
+    Returns
+    -------
+    below_points: ~np.ndarray
+        Points below the curve.
+    above_points: ~np.ndarray
+        Points above the curve.
+    """
+
+    below_points = [points for result in stream_results for points in result[1]]
+    above_points = [points for result in stream_results for points in result[2]]
+    if dense_output is True:
+        return np.concatenate(below_points), np.concatenate(above_points)
+
+    # Merging reservoirs is just keeping the smallest keys of all of them
+    if dense_output[0] == "reservoir":
+        _, size = dense_output
+        merged_points = []
+        for reservoirs in (below_points, above_points):
+            reservoir = np.concatenate(reservoirs)
+            if len(reservoir) > size:
+                smallest_keys = np.argpartition(reservoir[:, -1], size - 1)[:size]
+                reservoir = reservoir[smallest_keys]
+            merged_points.append(reservoir[:, :-1].astype(dtype))
+        return tuple(merged_points)
+
+    # Copy the rows of each stream into their final place, so all the inside
+    # points come first and all the outside ones next. Plain reads and writes
+    # keep the memory used by the copy bounded.
+    _, scratch_file, _, dense_file = dense_output
+    scratch_points = np.load(scratch_file, mmap_mode="r")
+    shape, scratch_header = scratch_points.shape, scratch_points.offset
+    row_size = scratch_points.strides[0]
+    del scratch_points
+    dense_header = np.lib.format.open_memmap(
+        dense_file, mode="w+", dtype=dtype, shape=shape
+    ).offset
+    with open(scratch_file, "rb") as source, open(dense_file, "r+b") as target:
+        target.seek(dense_header)
+        for start, stop in below_points + above_points:
+            source.seek(scratch_header + start * row_size)
+            target.write(source.read((stop - start) * row_size))
+    os.remove(scratch_file)
+
+    N_below = sum(stop - start for start, stop in below_points)
+    dense_points = np.load(dense_file, mmap_mode="r")
+    return dense_points[:N_below], dense_points[N_below:]
+
+
+def _split_cached_streams(streams, cached_moments):
+    """Separates the streams whose statistics are cached from the ones still to
+    be computed.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    cached_moments: list
+        Number of samples, mean vector and matrix of co-moments of each one of
+        the streams computed by a previous call.
+
+    Returns
+    -------
+    cached_results: list
+        Results of the leading streams whose samples are all cached.
+    pending_streams: list
+        The rest of streams, holding only the samples not cached yet.
+    extended_moments: dict
+        Cached statistics of the pending streams which are extended, keyed by
+        the spawn key of their seed sequence.
+
+    Notes
+    -----
+    The points of a stream do not depend on its length, so a stream holding
+    more samples than cached is the cached one followed by new samples. A
+    stream holding fewer samples than cached is computed again.
+    """
+
+    cached_results, pending_streams, extended_moments = [], [], {}
+    for index, (seed_sequence, N_samples) in enumerate(streams):
+        moments = cached_moments[index] if index < len(cached_moments) else None
+        if moments is not None and moments[0] == N_samples and not pending_streams:
+            cached_results.append((moments, [], [], None))
+        elif moments is not None and 0 < moments[0] < N_samples:
+            extended_moments[seed_sequence.spawn_key] = moments
+            pending_streams.append((seed_sequence, N_samples - moments[0]))
+        else:
+            pending_streams.append((seed_sequence, N_samples))
+    return cached_results, pending_streams, extended_moments
+
+
+def _merge_cached_streams(streams, stream_results, extended_moments, area=None):
+    """Merges the new samples of each stream with the cached ones.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    stream_results: iterable
+        The results of the kernel for each one of the streams.
+    extended_moments: dict
+        Cached statistics of the extended streams, keyed by the spawn key of
+        their seed sequence.
+    area: float
+        Area of the region of the hit-or-miss method. If given, the numbers of
+        hits are merged instead of the statistics, so an extended stream is
+        exactly the same as one computed at once. Other methods agree with a
+        direct computation up to rounding errors only.
+
+    Yields
+    ------
+    stream_result: tuple
+        The result of each stream including its cached samples.
+    """
+
+    def N_hits(moments):
+        return round(moments[1][0] / area * moments[0]) if area > 0 else 0
+
+    for (seed_sequence, _), stream_result in zip(streams, stream_results):
+        moments = extended_moments.get(seed_sequence.spawn_key)
+        if moments is not None:
+            new_moments, *points_and_timings = stream_result
+            if area is None:
+                moments = _merge_moments(moments, new_moments)
+            else:
+                moments = _hit_or_miss_moments(
+                    N_hits(moments) + N_hits(new_moments),
+                    moments[0] + new_moments[0],
+                    area,
+                )
+            stream_result = (moments, *points_and_timings)
+        yield stream_result
+
+
+def _collect_profile(stream_results, setup_time, N_evaluations):
+    """Adds up the timings and counters of all the streams.
+
+    Parameters
+    ----------
+    stream_results: list
+        The results of a kernel run with profiling enabled.
+    setup_time: float
+        Seconds spent before running the kernel.
+    N_evaluations: int
+        Amount of function evaluations needed by each sample.
+
+    Returns
+    -------
+    profile: MonteCarloProfile
+        Timings of each phase and counters.
+    """
+
+    # Streams taken from a cache were not timed
+    random_time, evaluation_time, reduction_time = sum(
+        (result[3] for result in stream_results if result[3] is not None),
+        np.zeros(3),
+    )
+    N_samples = sum(result[0][0] for result in stream_results)
+    return MonteCarloProfile(
+        setup_time=setup_time,
+        random_time=float(random_time),
+        evaluation_time=float(evaluation_time),
+        reduction_time=float(reduction_time),
+        N_streams=len(stream_results),
+        N_samples=N_samples,
+        N_points=N_samples * N_evaluations,
+    )
+
+
+def montecarlo_integral(
+    f_at_x,
+    limits=(0, 1),
+    N_points=1e5,
+    dense_output=False,
+    chunk_size=None,
+    seed=None,
+    workers=None,
+    method="hit-or-miss",
+    control=None,
+    N_strata=16,
+    full_output=False,
+    sampler="pseudo-random",
+    scramble="owen",
+    N_replicates=8,
+    envelope=None,
+    envelope_margin=0.05,
+    dtype=np.float64,
+    profile=False,
+    callback=None,
+    dense_size=10_000,
+    dense_file=None,
+    cache=None,
+):
+    """Integrates the fiven function within desired lower and upper limits via
+    Monte Carlo integration.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated. It receives all the points of a
+        block at once, as an array of N values for one-dimensional limits or as
+        an Nxd matrix otherwise.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration, either a (a, b) tuple or a (d, 2)
+        matrix holding one row per dimension.
+    N_points: int
+        Number of points: the higher this number, the greater the accuracy.
+    dense_output: boolean or str
+        If not `False`, inside and outside points are returned too, captured
+        in one of the following ways:
+
+        * `True`: all of them are kept in memory.
+        * "reservoir": a uniform sample of up to `dense_size` inside points
+          and as many outside points is kept in memory.
+        * "memmap": all of them are written, block by block, to the `.npy`
+          file `dense_file`. Inside and outside points are returned as
+          read-only memory-mapped views of its first and last rows.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once. Each point costs
+        about 40 bytes, so this value bounds the memory used by the method no
+        matter how large `N_points` is. If `None`, the points of each random
+        stream are drawn at once.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes sharing the work. If `None`, a single process is
+        used. The function to be integrated must be importable by the workers,
+        so lambdas are not allowed. Use `os.cpu_count()` for using all cores.
+    method: str
+        Estimator to be used, one of `METHODS`:
+
+        * "hit-or-miss": ratio of points below the curve within a rectangle.
+          Its height is the highest value of the function within a grid of
+          `N_GRID + 1` points plus `envelope_margin`. Maxima narrower than
+          the grid may still be cut, which is warned about when noticed.
+        * "sample-mean": (b - a) times the mean value of the function.
+        * "antithetic": sample-mean evaluating the function at x and a + b - x.
+        * "control-variate": sample-mean corrected by a control function.
+        * "stratified": sample-mean with the same number of points in each one
+          of `N_strata` equal sub-intervals of [a, b].
+    control: tuple
+        A (g_at_x, G_val) tuple with a function similar to the integrand and
+        the exact value of its integral. Only used by "control-variate".
+    N_strata: int
+        Number of sub-intervals for the "stratified" method.
+    full_output: boolean
+        If `True`, a MonteCarloResult holding the standard error and the
+        variance of the estimator is returned instead of the integral.
+    sampler: str
+        Generator of points, one of `SAMPLERS`. Low-discrepancy sequences
+        ("sobol" and "halton") fill the space more evenly than pseudo-random
+        numbers, so smooth integrands converge close to O(1/N) instead of
+        O(1/sqrt(N)). They require SciPy.
+    scramble: str
+        Randomization of the low-discrepancy sequences, one of `SCRAMBLES`:
+        Owen-type scrambling of the digits ("owen") or a random shift of all
+        the points ("shift").
+    N_replicates: int
+        Number of independently randomized low-discrepancy sequences. The error
+        is estimated from the spread of their results. Each Sobol' replicate
+        holds the next power of two above `N_points / N_replicates` points.
+    envelope: int
+        Number of segments of a piecewise-constant envelope replacing the
+        rectangle of the hit-or-miss method. Points are drawn below the
+        envelope, so fewer points are wasted far above peaked functions and
+        functions whose maximum lies inside [a, b] are fully enclosed. The
+        function is evaluated at 8 points per segment for building it. Only
+        available for one-dimensional limits.
+    envelope_margin: float
+        Safety margin added to the envelope or to the rectangle, as a fraction
+        of the highest value of the function. In more than one dimension,
+        hit-or-miss draws points within a box whose height is the highest
+        value of the function found by a random search plus this margin.
+    dtype: ~np.dtype
+        Floating point type of the random points. Using `np.float32` halves
+        the memory traffic per point at the cost of about seven significant
+        digits in the coordinates. Statistics are always accumulated in double
+        precision.
+    profile: boolean
+        If `True`, the time spent generating points, evaluating the function
+        and reducing the statistics is measured and stored, together with the
+        number of streams, samples and points, in the `profile` attribute of
+        the result. It implies `full_output`. If `False`, no clock is read.
+    callback: function
+        A function called after each random stream, in order, with a
+        MonteCarloProgress holding the running estimate and its standard
+        error. Each stream holds up to `STREAM_SIZE` points, or is one
+        replicate of a low-discrepancy sequence.
+    dense_size: int
+        Maximum number of inside and of outside points kept by the
+        "reservoir" dense output.
+    dense_file: str
+        Path of the file written by the "memmap" dense output. If `None`, a
+        temporary file is created and it is up to the caller to remove it.
+    cache: ~cache.ResultCache
+        Cache holding the statistics of previous integrations. Results are
+        reused if the function, the control, the seed and every option but
+        the number of points, the workers and the chunk size are the same.
+        If more points are asked than cached, only the missing ones are
+        drawn. The result is then exactly the one of a direct run for the
+        hit-or-miss method, and equal up to rounding errors for the rest.
+        Unseeded integrations are not cached and dense output can not be
+        cached.
+
+    Returns
+    -------
+    I_val: float or MonteCarloResult
+        The value for the integral (a.k.a. area under the curve).
+    """
+
+    start_time = time.perf_counter()
+
+    # Values such as 1 or 0 are taken as booleans, since the kernels tell the
+    # modes of dense output apart by identity
+    if not isinstance(dense_output, str):
+        dense_output = bool(dense_output)
+
+    kernel, kernel_args, N_evaluations = _prepare_estimator(
+        f_at_x,
+        limits,
+        method,
+        control,
+        N_strata,
+        dense_output,
+        envelope,
+        envelope_margin,
+    )
 
-def f_at_x(x):
-    """The function to be integrated.
+    # The number of points is only meaningful as an integer. If no chunk size is
+    # given, all the points of a stream are processed in a single block.
+    N_points, chunk_size, workers = _check_positive(
+        N_points=N_points,
+        chunk_size=STREAM_SIZE if chunk_size is None else chunk_size,
+        workers=1 if workers is None else workers,
+    )
+
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Provided {sampler = } is not one of {SAMPLERS}.")
+    if scramble not in SCRAMBLES:
+        raise ValueError(f"Provided {scramble = } is not one of {SCRAMBLES}.")
+    (N_replicates,) = _check_positive(N_replicates=N_replicates)
+    if dense_output not in DENSE_OUTPUTS:
+        raise ValueError(f"Provided {dense_output = } is not one of {DENSE_OUTPUTS}.")
+    if cache is not None and dense_output is not False:
+        raise ValueError("Dense output can not be cached.")
+    if seed is None:
+        cache = None
+
+    # Split the samples into independent random streams. Some estimators
+    # evaluate the function several times for each sample. Low-discrepancy
+    # sequences use one stream per randomized replicate.
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    N_samples = max(1, N_points // N_evaluations)
+    if sampler == "pseudo-random":
+        streams = _make_streams(seed, N_samples)
+    else:
+        replicate_size = max(1, N_samples // N_replicates)
+        if sampler == "sobol":
+            replicate_size = 1 << (replicate_size - 1).bit_length()
+        streams = _make_streams(seed, N_replicates * replicate_size, replicate_size)
+    dense_output = _prepare_dense_output(
+        dense_output, streams, limits, dense_size, dense_file, dtype
+    )
+
+    # Streams are identified by the seed, so the ones computed by a previous
+    # call are reused and only their missing samples are drawn
+    cached_moments, cached_results, extended_moments = [], [], {}
+    if cache is not None:
+        # Caching is optional, so its module is only imported when needed
+        from cache import make_key
+
+        cache_key = make_key(
+            f_at_x,
+            control,
+            np.asarray(limits, dtype=float),
+            np.ndim(limits),
+            method,
+            N_strata,
+            sampler,
+            scramble,
+            N_replicates,
+            envelope,
+            envelope_margin,
+            np.dtype(dtype).str,
+            seed.entropy,
+            seed.spawn_key,
+            STREAM_SIZE,
+        )
+        cached_moments = cache.get(cache_key) or []
+        cached_results, streams, extended_moments = _split_cached_streams(
+            streams, cached_moments
+        )
+
+    # Compute the statistics of each stream, maybe using several processes. If
+    # progress is reported, results are reduced as soon as each stream is done.
+    setup_time = time.perf_counter() - start_time
+    hit_or_miss_area = None
+    if method == "hit-or-miss":
+        hit_or_miss_area = _hit_or_miss_area(kernel_args[2], kernel_args[4])
+    kernel_args = (
+        *kernel_args,
+        chunk_size,
+        dense_output,
+        sampler,
+        scramble,
+        dtype,
+        profile is not False,
+        {key: moments[0] for key, moments in extended_moments.items()},
+    )
+    executor = None
+    if workers > 1 and streams:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if callback is None:
+            stream_results = cached_results + list(
+                _merge_cached_streams(
+                    streams,
+                    _map_streams(kernel, streams, kernel_args, executor, workers),
+                    extended_moments,
+                    hit_or_miss_area,
+                )
+            )
+        else:
+            stream_results = []
+            N_points_total = N_evaluations * (
+                sum(N for _, N in streams)
+                + sum(moments[0] for moments in extended_moments.values())
+                + sum(result[0][0] for result in cached_results)
+            )
+            for stream_result, *estimate in _running_reduction(
+                chain(
+                    cached_results,
+                    _merge_cached_streams(
+                        streams,
+                        _iter_streams(kernel, streams, kernel_args, executor, workers),
+                        extended_moments,
+                        hit_or_miss_area,
+                    ),
+                ),
+                method,
+                control,
+                sampler,
+            ):
+                stream_results.append(stream_result)
+                I_val, std_error, N_samples = estimate
+                callback(
+                    MonteCarloProgress(
+                        I_val=I_val,
+                        std_error=std_error,
+                        N_points=N_samples * N_evaluations,
+                        N_points_total=N_points_total,
+                        elapsed_time=time.perf_counter() - start_time,
+                    )
+                )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    # Keep the longest version of each stream for future calls
+    if cache is not None and streams:
+        stream_moments = [result[0] for result in stream_results]
+        cache.put(
+            cache_key,
+            [
+                max(versions, key=lambda moments: moments[0])
+                for versions in zip_longest(
+                    cached_moments, stream_moments, fillvalue=_empty_moments()
+                )
+            ],
+        )
+
+    # Reduce the partial statistics of all the streams and guess the area
+    # below the curve
+    I_val, std_error, N_samples = _reduce_stream_results(
+        stream_results, method, control, sampler
+    )
+    if full_output is not False or profile is not False:
+        N_points = N_samples * N_evaluations
+        I_val = MonteCarloResult(
+            I_val=I_val,
+            std_error=std_error,
+            N_points=N_points,
+            elapsed_time=time.perf_counter() - start_time,
+            variance=std_error ** 2 * N_points,
+            method=method,
+        )
+        if profile is not False:
+            I_val.profile = _collect_profile(stream_results, setup_time, N_evaluations)
+
+    # Returns desired amount of values
+    if dense_output is False:
+        return I_val
+    else:
+        return (I_val, *_gather_dense_output(stream_results, dense_output, dtype))
+
+
+def montecarlo_adaptive(
+    f_at_x,
+    limits=(0, 1),
+    atol=0.0,
+    rtol=1e-3,
+    confidence=None,
+    batch_size=1e4,
+    min_batches=4,
+    max_points=1e9,
+    max_time=None,
+    chunk_size=None,
+    seed=None,
+    workers=None,
+    method="hit-or-miss",
+    control=None,
+    N_strata=16,
+    envelope=None,
+    envelope_margin=0.05,
+    dtype=np.float64,
+    profile=False,
+    callback=None,
+):
+    """Integrates the given function until the desired accuracy is reached.
+
+    Points are drawn in batches. After each batch, the running mean and
+    variance are updated and the computation stops as soon as the error falls
+    below `max(atol, rtol * abs(I_val))`, once at least `min_batches` batches
+    have been drawn.
 
     Parameters
-    ---------
-    x: float
-        The independent variable.
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration. See `montecarlo_integral`.
+    atol: float
+        Absolute tolerance for the error.
+    rtol: float
+        Relative tolerance for the error.
+    confidence: float
+        If `None`, the error is the standard error. Otherwise, the error is the
+        half-width of the confidence interval with this level, e.g. 0.95.
+    batch_size: int
+        Number of points drawn between two consecutive checks.
+    min_batches: int
+        Minimum number of batches drawn before the tolerance is checked. Raise
+        it for integrands with narrow peaks, which may be missed by every
+        sample of the first batches.
+    max_points: int
+        Maximum number of points to be used.
+    max_time: float
+        Maximum computation time in seconds. If `None`, there is no limit.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes sharing the work. If `None`, a single process is
+        used.
+    method: str
+        Estimator to be used, one of `METHODS`. See `montecarlo_integral`.
+    control: tuple
+        A (g_at_x, G_val) tuple used by the "control-variate" method.
+    N_strata: int
+        Number of sub-intervals for the "stratified" method.
+    envelope: int
+        Number of segments of the hit-or-miss envelope. See
+        `montecarlo_integral`.
+    envelope_margin: float
+        Safety margin of the envelope or of the box.
+    dtype: ~np.dtype
+        Floating point type of the random points, either `np.float64` or
+        `np.float32`.
+    profile: boolean
+        If `True`, timings of each phase and counters are stored in the
+        `profile` attribute of the result. See `montecarlo_integral`.
+    callback: function
+        A function called after each batch with a MonteCarloProgress holding
+        the running estimate and its standard error.
 
     Returns
     -------
-    f_x: float
-        The value of the function evaluated at given point.
+    result: MonteCarloResult
+        The integral, its standard error, the number of points used and the
+        elapsed time.
+
+    Notes
+    -----
+    Each batch is an independent random stream and the tolerance is checked
+    after every stream in order, so results do not depend on `workers`.
+
+    An estimate with zero sample variance, as the one of a constant
+    integrand, is taken as converged once `min_batches` batches agree on it.
+    A zero variance may also mean that no sample has found a narrow peak yet,
+    which is what `min_batches` guards against.
     """
 
-    # Do you recognize this function?
-    f_x = np.sqrt(1 - x ** 2)
+    start_time = time.perf_counter()
+    kernel, kernel_args, N_evaluations = _prepare_estimator(
+        f_at_x, limits, method, control, N_strata, False, envelope, envelope_margin
+    )
+    batch_size, min_batches, max_points, workers = _check_positive(
+        batch_size=batch_size,
+        min_batches=min_batches,
+        max_points=max_points,
+        workers=1 if workers is None else workers,
+    )
+    chunk_size = batch_size if chunk_size is None else chunk_size
+    (chunk_size,) = _check_positive(chunk_size=chunk_size)
 
-    # TODO: What happens if the functions is...?
-    # f_x = np.sqrt(1 - x ** 2) * x ** 2
-    return f_x
+    # Budgets are given in points, while streams are made of samples
+    batch_size = max(1, batch_size // N_evaluations)
+    max_samples = max(1, max_points // N_evaluations)
 
+    # Standard errors are converted into half-widths of the confidence interval
+    # by means of the normal distribution
+    z_score = 1.0 if confidence is None else NormalDist().inv_cdf(0.5 + confidence / 2)
 
-def montecarlo_integral(f_at_x, limits=(0, 1), N_points=1e5, dense_output=False):
-    """Integrates the fiven function within desired lower and upper limits via
-    Monte Carlo integration.
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    setup_time = time.perf_counter() - start_time
+    kernel_args = (
+        *kernel_args,
+        chunk_size,
+        False,
+        "pseudo-random",
+        None,
+        dtype,
+        profile is not False,
+    )
+
+    moments, converged, profiled_results = _empty_moments(), False, []
+    N_batches = 0
+    I_val, sample_variance = np.nan, np.inf
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while not converged and moments[0] < max_samples:
+            if max_time is not None and time.perf_counter() - start_time > max_time:
+                break
+
+            # Each round computes one batch per worker
+            N_round = min(workers * batch_size, max_samples - moments[0])
+            streams = _make_streams(
+                seed, N_round, batch_size, first_stream=moments[0] // batch_size
+            )
+            stream_results = _map_streams(
+                kernel, streams, kernel_args, executor, workers
+            )
+
+            for stream_result in stream_results:
+                moments = _merge_moments(moments, stream_result[0])
+                N_batches += 1
+                I_val, sample_variance = _estimate_from_moments(
+                    moments, method, control
+                )
+                std_error = np.sqrt(sample_variance / moments[0])
+                if profile is not False:
+                    profiled_results.append(stream_result)
+                if callback is not None:
+                    callback(
+                        MonteCarloProgress(
+                            I_val=I_val,
+                            std_error=float(std_error),
+                            N_points=moments[0] * N_evaluations,
+                            N_points_total=max_samples * N_evaluations,
+                            elapsed_time=time.perf_counter() - start_time,
+                        )
+                    )
+                # A few batches are needed for trusting the error, otherwise a
+                # lucky first batch would stop the loop
+                if N_batches >= min_batches and z_score * std_error <= max(
+                    atol, rtol * abs(I_val)
+                ):
+                    converged = True
+                    break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return MonteCarloResult(
+        I_val=I_val,
+        std_error=float(np.sqrt(sample_variance / max(1, moments[0]))),
+        N_points=moments[0] * N_evaluations,
+        elapsed_time=time.perf_counter() - start_time,
+        converged=converged,
+        variance=sample_variance * N_evaluations,
+        method=method,
+        profile=(
+            _collect_profile(profiled_results, setup_time, N_evaluations)
+            if profile is not False
+            else None
+        ),
+    )
+
+
+def iter_montecarlo_integral(
+    f_at_x,
+    limits=(0, 1),
+    N_points=1e5,
+    batch_size=1e4,
+    dense_output=None,
+    chunk_size=None,
+    seed=None,
+    workers=None,
+    method="hit-or-miss",
+    control=None,
+    N_strata=16,
+    envelope=None,
+    envelope_margin=0.05,
+    dtype=np.float64,
+):
+    """Integrates the given function yielding the running estimate after each
+    batch of points.
 
     Parameters
     ----------
     f_at_x: function
         Name of the function to be integrated.
-    limits: tuple
-        Lower and upper limits of integration.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration. See `montecarlo_integral`.
     N_points: int
-        Number of points: the higher this number, the greater the accuracy.
+        Maximum number of points to be used.
+    batch_size: int
+        Number of points drawn between two consecutive estimates.
     dense_output: boolean
-        If `True` inside and outside points are returned.
+        If `True`, the inside and outside points of each batch are yielded
+        too. If `None`, they are only yielded by the hit-or-miss method.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes computing the batches ahead of the consumer. If
+        `None`, a single process is used.
+    method: str
+        Estimator to be used, one of `METHODS`. See `montecarlo_integral`.
+    control: tuple
+        A (g_at_x, G_val) tuple used by the "control-variate" method.
+    N_strata: int
+        Number of sub-intervals for the "stratified" method.
+    envelope: int
+        Number of segments of the hit-or-miss envelope. See
+        `montecarlo_integral`.
+    envelope_margin: float
+        Safety margin of the envelope or of the box.
+    dtype: ~np.dtype
+        Floating point type of the random points.
 
     Returns
     -------
-    I_val: float
-        The value for the integral (a.k.a. area under the curve).
+    estimates: generator
+        Yields (N_points, I_val, std_error, new_points) tuples, being
+        `N_points` the number of points used so far and `new_points` a
+        (below_points, above_points) tuple with the points of the last batch
+        or `None`. Stop iterating at any moment to stop the computation.
+
+    Notes
+    -----
+    Each batch is an independent random stream, so the same seed and batch
+    size always produce the same sequence of estimates.
     """
 
-    # Lower limit is named 'a' while upper one is 'b'
-    a, b = limits
+    if dense_output is None:
+        dense_output = method == "hit-or-miss"
+    kernel, kernel_args, N_evaluations = _prepare_estimator(
+        f_at_x,
+        limits,
+        method,
+        control,
+        N_strata,
+        bool(dense_output),
+        envelope,
+        envelope_margin,
+    )
+    N_points, batch_size, workers = _check_positive(
+        N_points=N_points,
+        batch_size=batch_size,
+        workers=1 if workers is None else workers,
+    )
+    (chunk_size,) = _check_positive(
+        chunk_size=batch_size if chunk_size is None else chunk_size
+    )
 
-    # Provided limits must have different values and in increasing order
+    # Budgets are given in points, while streams are made of samples
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = _make_streams(
+        seed,
+        max(1, N_points // N_evaluations),
+        max(1, batch_size // N_evaluations),
+    )
+    kernel_args = (
+        *kernel_args,
+        chunk_size,
+        bool(dense_output),
+        "pseudo-random",
+        None,
+        dtype,
+        False,
+    )
+
+    # Options are checked right now, while the work is done as the consumer
+    # asks for more estimates
+    return _running_estimates(
+        kernel, streams, kernel_args, workers, method, control, N_evaluations
+    )
+
+
+def _running_estimates(
+    kernel, streams, kernel_args, workers, method, control, N_evaluations
+):
+    """Yields the running estimate after each stream. See
+    `iter_montecarlo_integral`.
+
+    Parameters
+    ----------
+    kernel: function
+        Function computing the statistics of a collection of streams.
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    kernel_args: tuple
+        Additional positional arguments for the kernel.
+    workers: int
+        Number of processes.
+    method: str
+        Name of the estimator.
+    control: tuple
+        Control function and the known value of its integral.
+    N_evaluations: int
+        Amount of function evaluations needed by each sample.
+
+    Yields
+    ------
+    estimate: tuple
+        The number of points used so far, the value for the integral, its
+        standard error and the new points, if any.
+    """
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
     try:
-        assert a < b
-    except AssertionError:
-        raise ValueError(f"Provided {limits = } are not valid ones.")
+        for stream_result, I_val, std_error, N_samples in _running_reduction(
+            _iter_streams(kernel, streams, kernel_args, executor, workers),
+            method,
+            control,
+            "pseudo-random",
+        ):
+            _, below_points, above_points, _ = stream_result
+            new_points = None
+            if below_points:
+                new_points = np.concatenate(below_points), np.concatenate(above_points)
+            yield N_samples * N_evaluations, I_val, std_error, new_points
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
 
-    # Evaluate function value. Lower limit is named 'a' while upper one is 'b'.
-    # You could use the 'limits' variable here instead of '(a, b)', but this
-    # last way is more explicit.
-    f_at_a, f_at_b = [f_at_x(x) for x in (a, b)]
 
-    # Compute the base and height of the rectangle and collect those inside the
-    # same matrix.
-    rectangle_base, rectangle_height = b - a, max([f_at_a, f_at_b])
-    rectangle_sides = np.array([rectangle_base, rectangle_height])
+def _vegas_iteration(
+    seed_sequence, f_at_x, grid, N_points, chunk_size, one_dimensional
+):
+    """Integrates the function once by importance sampling from a grid.
+
+    Parameters
+    ----------
+    seed_sequence: ~np.random.SeedSequence
+        Seed of the random stream.
+    f_at_x: function
+        Name of the function to be integrated.
+    grid: ~np.ndarray
+        A dx(K+1) matrix with the edges of the K bins of each dimension.
+    N_points: int
+        Number of points.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    one_dimensional: boolean
+        If `True`, the function expects one-dimensional arrays.
+
+    Returns
+    -------
+    moments: tuple
+        Running statistics of the weighted values of the function.
+    contributions: ~np.ndarray
+        A dxK matrix with the sum of the squared weighted values of the
+        function within each bin.
+
+    Notes
+    -----
+    Every bin of a dimension is chosen with the same probability, so narrow
+    bins concentrate points. Each point is weighted by the inverse of its
+    probability density, which is the product of K times the width of its bin
+    in each dimension.
+    """
+
+    N_dims, N_bins = grid.shape[0], grid.shape[1] - 1
+    bins_width = np.diff(grid, axis=1)
+    dims = np.arange(N_dims)
+    chunk_size = min(chunk_size, N_points)
+    uniforms_buffer = np.empty((chunk_size, N_dims))
+
+    rng = np.random.default_rng(seed_sequence)
+    moments = _empty_moments()
+    contributions = np.zeros((N_dims, N_bins))
+    for first_point in range(0, N_points, chunk_size):
+        N_block = min(chunk_size, N_points - first_point)
+
+        # Choose a bin in each dimension and a position within the bin
+        uniforms = rng.random(out=uniforms_buffer[:N_block])
+        uniforms *= N_bins
+        rand_bin = np.minimum(uniforms.astype(int), N_bins - 1)
+        uniforms -= rand_bin
+        rand_x = grid[dims, rand_bin] + uniforms * bins_width[dims, rand_bin]
+        jacobian = np.prod(N_bins * bins_width[dims, rand_bin], axis=1)
+
+        # Weighted values of the function are estimates of the integral
+        samples = _evaluate(f_at_x, rand_x, one_dimensional) * jacobian
+        block_mean = samples.mean(keepdims=True)
+        deviations = samples - block_mean
+        moments = _merge_moments(
+            moments, (N_block, block_mean, np.array([[deviations @ deviations]]))
+        )
+
+        # Accumulate the contribution of each bin for refining the grid
+        for dim in dims:
+            contributions[dim] += np.bincount(
+                rand_bin[:, dim], weights=samples ** 2, minlength=N_bins
+            )
 
-    # Evaluate the area of the rectangle
-    rectangle_area = rectangle_base * rectangle_height
+    return moments, contributions
 
-    # Generate a collection of random x and y values, all of them located within
-    # the desired rectangle. Notice the random function generates values between
-    # [0, 1] whose purpose is to be used as scaling values. In addition, the
-    # value of 'a' limit needs to be added to the x-coordinates in order to
-    # shitf the location of this points
-    random_points = (
-        np.array([a, 0]) + np.random.rand(int(N_points), 2) * rectangle_sides
+
+def _refine_grid(grid, contributions, alpha):
+    """Moves the edges of the grid towards the regions contributing the most.
+
+    Parameters
+    ----------
+    grid: ~np.ndarray
+        A dx(K+1) matrix with the edges of the K bins of each dimension.
+    contributions: ~np.ndarray
+        A dxK matrix with the contribution of each bin.
+    alpha: float
+        Damping exponent. The lower, the slower the grid changes.
+
+    Returns
+    -------
+    new_grid: ~np.ndarray
+        A dx(K+1) matrix with the refined edges.
+    """
+
+    new_grid = grid.copy()
+    for dim, (edges, bins_contribution) in enumerate(zip(grid, contributions)):
+        # Smooth the contributions with the ones of the neighbouring bins
+        smoothed = np.convolve(bins_contribution, np.ones(3), mode="same")
+        smoothed /= np.convolve(np.ones_like(smoothed), np.ones(3), mode="same")
+        if smoothed.sum() <= 0:
+            continue
+
+        # Damp the changes using the classic VEGAS compression
+        ratio = np.clip(smoothed / smoothed.sum(), 1e-30, 1 - 1e-15)
+        weights = ((ratio - 1) / np.log(ratio)) ** alpha
+
+        # New edges split the total weight into bins holding the same amount
+        cumulative_weights = np.concatenate([[0], np.cumsum(weights)])
+        targets = np.linspace(0, cumulative_weights[-1], len(edges))
+        new_grid[dim] = np.interp(targets, cumulative_weights, edges)
+
+    return new_grid
+
+
+def montecarlo_vegas(
+    f_at_x,
+    limits=(0, 1),
+    N_points=1e4,
+    N_iterations=10,
+    N_warmup=5,
+    N_bins=50,
+    alpha=1.5,
+    grid=None,
+    chunk_size=None,
+    seed=None,
+):
+    """Integrates the given function via adaptive importance sampling, also
+    known as the VEGAS algorithm.
+
+    Points are drawn from a piecewise-constant probability density defined by
+    a grid of bins in each dimension. After each iteration, the grid is refined
+    so bins become narrower where the function contributes the most. The first
+    iterations only train the grid. The rest of them are combined weighting
+    each one by the inverse of its variance.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration. See `montecarlo_integral`.
+    N_points: int
+        Number of points of each iteration.
+    N_iterations: int
+        Number of iterations used for computing the integral.
+    N_warmup: int
+        Number of previous iterations used only for training the grid.
+    N_bins: int
+        Number of bins in each dimension.
+    alpha: float
+        Damping exponent for refining the grid. The lower, the slower the grid
+        changes between iterations.
+    grid: ~np.ndarray
+        A dx(N_bins+1) matrix with the edges of the bins, e.g. the grid learned
+        by a previous run over the same function and limits. If `None`, equal
+        bins are used.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+
+    Returns
+    -------
+    result: MonteCarloResult
+        The integral, its standard error and the learned grid.
+    """
+
+    start_time = time.perf_counter()
+    lower, upper, one_dimensional = _parse_limits(limits)
+    N_points, N_iterations, N_bins, chunk_size = _check_positive(
+        N_points=N_points,
+        N_iterations=N_iterations,
+        N_bins=N_bins,
+        chunk_size=STREAM_SIZE if chunk_size is None else chunk_size,
     )
-    rand_x, rand_f_at_x = random_points.T
+    N_warmup = int(N_warmup)
 
-    # Evaluate the function at previously randomly generated x-coordinates. The
-    # x-coordinates are located in the first column of the matrix
-    f_at_rand_x = f_at_x(rand_x)
+    # Start with equal bins unless a grid is provided
+    if grid is None:
+        equal_bins = np.linspace(0, 1, N_bins + 1)
+        grid = lower[:, np.newaxis] + np.outer(upper - lower, equal_bins)
+    grid = np.array(grid, dtype=float)
+    if grid.ndim != 2 or len(grid) != len(lower):
+        raise ValueError(f"Provided grid with {grid.shape = } does not fit limits.")
 
-    # Compare randomly generated y-coordinates with previously computed ones
-    is_below_curve = rand_f_at_x < f_at_rand_x
+    # Each iteration is an independent random stream
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = _make_streams(seed, (N_warmup + N_iterations) * N_points, N_points)
 
-    # Guess the area below the curve
-    I_val = rectangle_area * (len(random_points[is_below_curve]) / int(N_points))
+    I_vals, variances = [], []
+    for iteration, (seed_sequence, _) in enumerate(streams):
+        moments, contributions = _vegas_iteration(
+            seed_sequence, f_at_x, grid, N_points, chunk_size, one_dimensional
+        )
+        if iteration >= N_warmup:
+            I_val, sample_variance = _estimate_from_moments(moments, "vegas", None)
+            I_vals.append(I_val)
+            variances.append(sample_variance / N_points)
+        grid = _refine_grid(grid, contributions, alpha)
 
-    # Returns desired amount of values
-    if dense_output is False:
-        return I_val
+    # Combine the iterations weighting each one by the inverse of its variance
+    weights = 1 / np.maximum(variances, np.finfo(float).tiny)
+    I_val = np.sum(weights * I_vals) / np.sum(weights)
+    std_error = 1 / np.sqrt(np.sum(weights))
+    N_points = N_iterations * N_points
+
+    return MonteCarloResult(
+        I_val=float(I_val),
+        std_error=float(std_error),
+        N_points=N_points,
+        elapsed_time=time.perf_counter() - start_time,
+        variance=float(std_error ** 2 * N_points),
+        method="vegas",
+        grid=grid,
+    )
+
+
+def _batch_streams(streams, f_at_x, lower, upper, one_dimensional, thetas, chunk_size):
+    """Computes the running statistics of a batch of integrals for a collection
+    of streams. All the integrals share the same random values.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    f_at_x: function
+        Name of the function to be integrated.
+    lower: ~np.ndarray
+        A Pxd matrix with the lower limits of integration of each integral.
+    upper: ~np.ndarray
+        A Pxd matrix with the upper limits of integration of each integral.
+    one_dimensional: boolean
+        If `True`, the function expects PxN matrices instead of PxNxd arrays.
+    thetas: ~np.ndarray
+        Parameters of each integral, or `None` if the function has none.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once, counting the
+        points of all the integrals.
+
+    Returns
+    -------
+    stream_results: list
+        A list with the running statistics of all the integrals for each one of
+        the streams.
+    """
+
+    (N_problems, N_dims), domain_sides = lower.shape, upper - lower
+    domain_volume = np.prod(domain_sides, axis=1, keepdims=True)
+    chunk_size = max(1, min(chunk_size // N_problems, max(N for _, N in streams)))
+
+    # Random values are shared by all the integrals and mapped into each domain
+    # through an affine transformation written into a reusable buffer
+    uniforms_buffer = np.empty((chunk_size, N_dims))
+    points_buffer = np.empty((N_problems, chunk_size, N_dims))
+    origin, sides = lower[:, np.newaxis, :], domain_sides[:, np.newaxis, :]
+
+    stream_results = []
+    for seed_sequence, N_samples in streams:
+        rng = np.random.default_rng(seed_sequence)
+        moments = (0, np.zeros(N_problems), np.zeros(N_problems))
+
+        for first_sample in range(0, N_samples, chunk_size):
+            N_block = min(chunk_size, N_samples - first_sample)
+            uniforms = rng.random(out=uniforms_buffer[:N_block])
+            rand_x = np.multiply(uniforms, sides, out=points_buffer[:, :N_block])
+            rand_x += origin
+
+            # A single call evaluates all the integrals
+            if one_dimensional:
+                rand_x = rand_x[..., 0]
+            if thetas is None:
+                samples = f_at_x(rand_x)
+            else:
+                samples = f_at_x(rand_x, thetas)
+            samples = np.broadcast_to(samples, (N_problems, N_block)) * domain_volume
+
+            # Update the statistics of the stream with the ones of the block
+            block_mean = samples.mean(axis=1)
+            block_M2 = ((samples - block_mean[:, np.newaxis]) ** 2).sum(axis=1)
+            moments = _merge_moments(moments, (N_block, block_mean, block_M2))
+
+        stream_results.append(moments)
+
+    return stream_results
+
+
+def montecarlo_integral_batch(
+    f_at_x,
+    limits=(0, 1),
+    N_points=1e5,
+    thetas=None,
+    chunk_size=None,
+    seed=None,
+    workers=None,
+):
+    """Integrates a batch of similar integrals at once via the sample-mean
+    Monte Carlo estimator.
+
+    The same random values are used for all the integrals. They are mapped into
+    the domain of each integral and the function is evaluated for all of them
+    within a single call, avoiding the overhead of calling
+    `montecarlo_integral` many times.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated. It is called as `f_at_x(x)` or,
+        if `thetas` are given, as `f_at_x(x, thetas)`. The points are a PxN
+        matrix for one-dimensional integrals or a PxNxd array otherwise, being
+        P the number of integrals. Parameters are given as a Px1x... array, so
+        they broadcast against the points.
+    limits: tuple or ~np.ndarray
+        Lower and upper limits of integration. A (a, b) tuple is shared by all
+        the integrals. Otherwise, a Px2 matrix for one-dimensional integrals or
+        a Pxdx2 array for d-dimensional ones.
+    N_points: int
+        Number of points for each one of the integrals.
+    thetas: ~np.ndarray
+        Parameters of each integral, stacked along the first dimension.
+    chunk_size: int
+        Maximum number of points drawn and evaluated at once, counting the
+        points of all the integrals.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes sharing the work. If `None`, a single process is
+        used.
+
+    Returns
+    -------
+    I_vals: ~np.ndarray
+        The value for each one of the integrals.
+    std_errors: ~np.ndarray
+        The standard error of each one of the integrals.
+    """
+
+    # Limits are stored as Pxdx2 arrays, sharing them if only one is given
+    limits = np.asarray(limits, dtype=float)
+    one_dimensional = limits.ndim < 3
+    limits = limits.reshape(-1, 1, 2) if one_dimensional else limits
+    if thetas is not None:
+        thetas = np.asarray(thetas)
+        if len(limits) not in (1, len(thetas)):
+            raise ValueError("Provided limits and thetas have different lengths.")
+        limits = np.broadcast_to(limits, (len(thetas), *limits.shape[1:]))
+        thetas = thetas.reshape(len(thetas), 1, *thetas.shape[1:])
+    lower, upper = limits[..., 0], limits[..., 1]
+
+    # Provided limits must have different values and in increasing order
+    try:
+        assert np.all(lower < upper)
+    except AssertionError:
+        raise ValueError(f"Provided {limits = } are not valid ones.")
+
+    N_points, chunk_size, workers = _check_positive(
+        N_points=N_points,
+        chunk_size=STREAM_SIZE if chunk_size is None else chunk_size,
+        workers=1 if workers is None else workers,
+    )
+
+    # Split the points into independent random streams
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = _make_streams(seed, N_points)
+
+    # Compute the statistics of each stream, maybe using several processes
+    kernel_args = (f_at_x, lower, upper, one_dimensional, thetas, chunk_size)
+    if workers == 1:
+        stream_results = _map_streams(_batch_streams, streams, kernel_args)
     else:
-        return I_val, random_points[is_below_curve], random_points[~is_below_curve]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            stream_results = _map_streams(
+                _batch_streams, streams, kernel_args, executor, workers
+            )
+
+    # Reduce the partial statistics of all the streams
+    moments = (0, np.zeros(len(lower)), np.zeros(len(lower)))
+    for stream_moments in stream_results:
+        moments = _merge_moments(moments, stream_moments)
+    N, I_vals, M2 = moments
+    std_errors = np.sqrt(M2 / (N - 1) / N) if N > 1 else np.full(len(lower), np.inf)
+
+    return I_vals, std_errors
 
 
 def plot_function(f_at_x, limits=(0, 1), N_points=100, ax=None, **kargs):
@@ -113,6 +2696,9 @@ def plot_function(f_at_x, limits=(0, 1), N_points=100, ax=None, **kargs):
         A dictionary holding additional customization options.
     """
 
+    # Plotting is optional, so matplotlib is only imported when needed
+    import matplotlib.pyplot as plt
+
     # Check if axes available
     if ax is None:
         _, ax = plt.subplots()
@@ -128,46 +2714,351 @@ def plot_function(f_at_x, limits=(0, 1), N_points=100, ax=None, **kargs):
     ax.plot(x, f_x, **kargs)
     return ax
 
-def plot_points(points, ax=None, **kargs):
+def plot_points(points, ax=None, max_points=None, raster=False, **kargs):
     """Plots desired points on given axes.
 
     Parameters
     ----------
     points: ~np.ndarray
-        An Nx2 matrix holding the x and y coordinates of the points.
+        An Nx2 matrix holding the x and y coordinates of the points. It may be
+        a memory-mapped array, as returned by the "memmap" dense output.
     ax: ~matplotlib.pyplot.Axes
         Axes of the figure.
+    max_points: int
+        Maximum number of points to be drawn. If there are more, evenly spaced
+        rows are taken, so only those are read from a memory-mapped array.
+    raster: boolean
+        If `True`, points are binned into an image at the resolution of the
+        axes instead of drawing one marker per point. See `plot_density`.
     **kargs: dict
         Additional customization parameters.
     """
 
+    import matplotlib.pyplot as plt
+
+    if raster is not False:
+        color = kargs.pop("color", "C0")
+        return plot_density([points], colors=(color,), ax=ax, **kargs)
+
     if ax is None:
         _, ax = plt.subplots()
 
+    if max_points is not None and len(points) > max_points:
+        step = int(np.ceil(len(points) / max_points))
+        points = points[::step]
+
     ax.scatter(points[:,0], points[:,1], **kargs)
     return ax
 
-def main():
-    """Entry point of the script."""
 
-    # Compute the area under the curve and collect random points
-    I_val, below_points, above_points = montecarlo_integral(
-            f_at_x, limits=(0, 1), N_points=1e4, dense_output=True
+@dataclass
+class PointsRaster:
+    """Density image of sets of points, which may be filled block by block.
+
+    Each set of points is binned into its own channel, i.e. a 2-D histogram
+    of counts, so the memory and the cost of drawing depend on the number of
+    pixels and not on the number of points.
+
+    Parameters
+    ----------
+    extent: tuple
+        The (x_min, x_max, y_min, y_max) region covered by the image. Points
+        outside of it are ignored.
+    shape: tuple
+        Number of rows and columns of pixels.
+    colors: tuple
+        Color of each one of the channels.
+    counts: ~np.ndarray
+        Number of points of each channel falling within each pixel. If `None`,
+        all of them start at zero.
+    """
+
+    extent: tuple
+    shape: tuple = (480, 640)
+    colors: tuple = ("g", "r")
+    counts: np.ndarray = None
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = np.zeros((len(self.colors), *self.shape), dtype=np.int64)
+
+    @classmethod
+    def for_axes(cls, ax, extent, colors=("g", "r")):
+        """Returns an empty raster holding one pixel per pixel of the axes.
+
+        Parameters
+        ----------
+        ax: ~matplotlib.pyplot.Axes
+            Axes of the figure.
+        extent: tuple
+            The (x_min, x_max, y_min, y_max) region covered by the image.
+        colors: tuple
+            Color of each one of the channels.
+
+        Returns
+        -------
+        raster: PointsRaster
+            The empty raster.
+        """
+
+        bbox = ax.get_window_extent()
+        shape = (max(1, int(bbox.height)), max(1, int(bbox.width)))
+        return cls(extent=tuple(extent), shape=shape, colors=colors)
+
+    def add(self, points, channel=0):
+        """Bins the points into one of the channels.
+
+        Parameters
+        ----------
+        points: ~np.ndarray
+            An NxM matrix whose first two columns hold the x and y coordinates.
+            It may be memory-mapped, since it is read in blocks.
+        channel: int
+            Index of the channel receiving the points.
+        """
+
+        x_min, x_max, y_min, y_max = self.extent
+        N_rows, N_columns = self.shape
+        for first_point in range(0, len(points), STREAM_SIZE):
+            x, y = np.asarray(points[first_point : first_point + STREAM_SIZE, :2]).T
+
+            # Points lying on the upper edges belong to the last pixels
+            is_inside = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+            column = (x[is_inside] - x_min) * (N_columns / (x_max - x_min))
+            row = (y[is_inside] - y_min) * (N_rows / (y_max - y_min))
+            pixel = np.minimum(row.astype(np.intp), N_rows - 1) * N_columns
+            pixel += np.minimum(column.astype(np.intp), N_columns - 1)
+
+            self.counts[channel] += np.bincount(
+                pixel, minlength=N_rows * N_columns
+            ).reshape(self.shape)
+
+    def to_rgba(self):
+        """Converts the counts into an image.
+
+        Returns
+        -------
+        image: ~np.ndarray
+            A (rows, columns, 4) matrix of colors. Each pixel mixes the colors
+            of the channels according to their counts and its opacity grows
+            with the logarithm of its total count.
+        """
+
+        total_counts = self.counts.sum(axis=0)
+        image = np.zeros((*self.shape, 4))
+        if total_counts.max() == 0:
+            return image
+
+        from matplotlib.colors import to_rgba_array
+
+        weights = self.counts / np.maximum(total_counts, 1)
+        colors = to_rgba_array(self.colors)[:, :3]
+        image[..., :3] = np.tensordot(weights, colors, axes=(0, 0))
+        image[..., 3] = np.log1p(total_counts) / np.log1p(total_counts.max())
+        return image
+
+    def draw(self, ax=None, **kargs):
+        """Draws the image on given axes.
+
+        Parameters
+        ----------
+        ax: ~matplotlib.pyplot.Axes
+            Axes of the figure.
+        **kargs: dict
+            Additional customization parameters for `imshow`.
+
+        Returns
+        -------
+        ax: ~matplotlib.pyplot.Axes
+            Axes of the figure.
+        """
+
+        import matplotlib.pyplot as plt
+
+        if ax is None:
+            _, ax = plt.subplots()
+
+        kargs = {"interpolation": "nearest", "aspect": "auto", **kargs}
+        ax.imshow(self.to_rgba(), extent=self.extent, origin="lower", **kargs)
+        return ax
+
+
+def plot_density(points_sets, colors=("g", "r"), ax=None, extent=None, **kargs):
+    """Plots the density of several sets of points as an image.
+
+    Parameters
+    ----------
+    points_sets: list
+        Matrices of points, e.g. the inside and outside ones. The first two
+        columns hold the x and y coordinates.
+    colors: tuple
+        Color of each set of points.
+    ax: ~matplotlib.pyplot.Axes
+        Axes of the figure. The image holds one pixel per pixel of the axes.
+    extent: tuple
+        The (x_min, x_max, y_min, y_max) region covered by the image. If
+        `None`, the one enclosing all the points.
+    **kargs: dict
+        Additional customization parameters for `imshow`.
+
+    Returns
+    -------
+    ax: ~matplotlib.pyplot.Axes
+        Axes of the figure.
+    """
+
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        _, ax = plt.subplots()
+
+    # Bounds are found block by block, so memory-mapped points are not loaded
+    if extent is None:
+        lower, upper = np.full(2, np.inf), np.full(2, -np.inf)
+        for points in points_sets:
+            for first_point in range(0, len(points), STREAM_SIZE):
+                block = np.asarray(points[first_point : first_point + STREAM_SIZE, :2])
+                lower = np.minimum(lower, block.min(axis=0, initial=np.inf))
+                upper = np.maximum(upper, block.max(axis=0, initial=-np.inf))
+        extent = (lower[0], upper[0], lower[1], upper[1])
+
+    raster = PointsRaster.for_axes(ax, extent, colors)
+    for channel, points in enumerate(points_sets):
+        raster.add(points, channel)
+    return raster.draw(ax, **kargs)
+
+
+def animate_montecarlo_integral(
+    f_at_x, limits=(0, 1), N_points=1e6, batch_size=1e4, interval=20, **kargs
+):
+    """Draws the random points and the convergence of the integral while it is
+    being computed.
+
+    Parameters
+    ----------
+    f_at_x: function
+        Name of the function to be integrated.
+    limits: tuple
+        Lower and upper limits of integration.
+    N_points: int
+        Maximum number of points to be used.
+    batch_size: int
+        Number of points drawn between two consecutive frames.
+    interval: int
+        Delay between frames in milliseconds.
+    **kargs: dict
+        Additional options for `iter_montecarlo_integral`.
+
+    Returns
+    -------
+    animation: ~matplotlib.animation.FuncAnimation
+        The animation. Keep a reference to it until the figure is closed.
+        Closing the figure stops the computation.
+
+    Notes
+    -----
+    Only the artists that change are redrawn in each frame. New points are
+    binned into the density image of `PointsRaster`, so the cost of a frame
+    depends on the number of pixels and not on the number of points drawn.
+    """
+
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    estimates = iter_montecarlo_integral(f_at_x, limits, N_points, batch_size, **kargs)
+    fig, (points_ax, convergence_ax) = plt.subplots(1, 2, figsize=(11, 4.5))
+
+    # The function and the axes are static, so they are part of the background
+    a, b = limits
+    plot_function(f_at_x, limits, ax=points_ax, color="k")
+    lower, upper, one_dimensional = _parse_limits(limits)
+    _, rectangle_sides = _bounding_rectangle(
+        f_at_x, lower, upper, one_dimensional, kargs.get("envelope_margin", 0.05)
+    )
+    extent = (a, b, 0, max(rectangle_sides[-1], points_ax.get_ylim()[1]))
+    points_ax.set_xlim(extent[:2])
+    points_ax.set_ylim(extent[2:])
+    points_ax.set_title(r"Integrating $f(x)$ via Monte Carlo")
+    points_ax.set_xlabel(r"$x$")
+    points_ax.set_ylabel(r"$f(x)$")
+
+    convergence_ax.set_xscale("log")
+    convergence_ax.set_xlim(batch_size, N_points)
+    convergence_ax.set_title("Convergence of the estimate")
+    convergence_ax.set_xlabel("Number of points")
+    convergence_ax.set_ylabel("Area under the curve")
+
+    # Changing artists are animated, so they are left out of the background
+    raster = PointsRaster.for_axes(points_ax, extent)
+    image = points_ax.imshow(
+        raster.to_rgba(),
+        extent=extent,
+        origin="lower",
+        interpolation="nearest",
+        aspect="auto",
+        animated=True,
+    )
+    (estimate_line,) = convergence_ax.plot([], [], color="k", animated=True)
+    (upper_line,) = convergence_ax.plot([], [], "k--", lw=0.8, animated=True)
+    (lower_line,) = convergence_ax.plot([], [], "k--", lw=0.8, animated=True)
+    label = convergence_ax.text(
+        0.03, 0.95, "", transform=convergence_ax.transAxes, va="top", animated=True
+    )
+    artists = (image, estimate_line, upper_line, lower_line, label)
+    history = []
+
+    def update(estimate):
+        N_used, I_val, std_error, new_points = estimate
+        if new_points is not None:
+            for channel, points in enumerate(new_points):
+                raster.add(points, channel)
+            image.set_data(raster.to_rgba())
+
+        history.append((N_used, I_val, std_error))
+        N_history, I_history, error_history = np.transpose(history)
+        estimate_line.set_data(N_history, I_history)
+        upper_line.set_data(N_history, I_history + error_history)
+        lower_line.set_data(N_history, I_history - error_history)
+        label.set_text(f"$I$ = {I_val:.5f} $\\pm$ {std_error:.1e}")
+
+        # Changing the limits requires drawing the whole figure again, so they
+        # are only widened when the band does not fit anymore
+        bottom, top = convergence_ax.get_ylim()
+        margin = 4 * std_error if 0 < std_error < np.inf else 0.1 * abs(I_val) or 1
+        if len(history) == 1:
+            bottom, top = I_val - margin, I_val + margin
+        elif I_val - std_error < bottom or I_val + std_error > top:
+            bottom, top = min(bottom, I_val - margin), max(top, I_val + margin)
+        if (bottom, top) != convergence_ax.get_ylim():
+            convergence_ax.set_ylim(bottom, top)
+            fig.canvas.draw()
+        return artists
+
+    return FuncAnimation(
+        fig,
+        update,
+        frames=estimates,
+        init_func=lambda: artists,
+        interval=interval,
+        blit=True,
+        repeat=False,
+        cache_frame_data=False,
     )
-    print(f"Area under the curve = {I_val:.5f}.")
 
-    # Draw the function and the points to have a graphical representation
-    fig, ax = plt.subplots()
-    ax = plot_function(f_at_x, ax=ax, color="k")
-    ax = plot_points(below_points, ax=ax, color="g", s=1.5)
-    ax = plot_points(above_points, ax=ax, color="r", s=1.5)
 
-    # Add figure title and labels
-    ax.set_title(r"Integrating $f(x)$ via Monte Carlo")
-    ax.set_xlabel(r"$x$")
-    ax.set_ylabel(r"$f(x)$")
-    ax.set_aspect("equal")
+def main():
+    """Entry point of the script."""
+
+    import matplotlib.pyplot as plt
+
+    # Compute the area under the curve while drawing the random points and the
+    # running estimate. Close the window for stopping once it looks stable.
+    # The animation only lives as long as there is a reference to it.
+    animation = animate_montecarlo_integral(
+        f_at_x, limits=(0, 1), N_points=1e6, batch_size=1e4
+    )
     plt.show()
+    return animation
 
 
 if __name__ == "__main__":
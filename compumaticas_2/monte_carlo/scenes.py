@@ -0,0 +1,394 @@
+"""
+Monte Carlo estimation of the area covered by the shapes of a drawing.
+
+Scenes are made of annuli, such as the rings of the Olympic games logo, and of
+filled discs, such as the stars of a night sky. Points are tested only against
+the shapes close to them by means of a uniform grid, so millions of points can
+be tested against thousands of shapes. The covered area and the fraction of it
+where shapes overlap are estimated together with their standard errors.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from main import (
+    STREAM_SIZE,
+    _check_positive,
+    _empty_moments,
+    _make_streams,
+    _map_streams,
+    _merge_moments,
+)
+
+
+class ShapeIndex:
+    """A uniform grid holding annuli and discs, for point-in-shape queries.
+
+    Parameters
+    ----------
+    centers: ~np.ndarray
+        An Mx2 matrix holding the center of each shape.
+    inner_radii: ~np.ndarray
+        Inner radius of each shape, zero for discs.
+    outer_radii: ~np.ndarray
+        Outer radius of each shape.
+    cell_size: float
+        Side of the cells of the grid. If `None`, the mean outer diameter of
+        the shapes is used, so each shape spans a few cells only.
+
+    Notes
+    -----
+    Each shape is stored in every cell its bounding box overlaps. The cells
+    are kept in compressed form: `cell_shapes[cell_starts[i]:cell_starts[i+1]]`
+    are the shapes of the i-th cell.
+    """
+
+    def __init__(self, centers, inner_radii, outer_radii, cell_size=None):
+        self.centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        self.inner_radii, self.outer_radii = np.broadcast_arrays(
+            np.asarray(inner_radii, dtype=float), np.asarray(outer_radii, dtype=float)
+        )
+        if len(self.centers) == 0:
+            raise ValueError("Provided scene has no shapes.")
+        if np.any(self.inner_radii < 0) or np.any(self.outer_radii < self.inner_radii):
+            raise ValueError("Provided radii must satisfy 0 <= inner <= outer.")
+
+        # The grid covers the bounding box of all the shapes
+        self.lower = np.min(self.centers - self.outer_radii[:, None], axis=0)
+        self.upper = np.max(self.centers + self.outer_radii[:, None], axis=0)
+        if cell_size is None:
+            cell_size = 2 * np.mean(self.outer_radii)
+        self.cell_size = cell_size if cell_size > 0 else 1.0
+        self.shape = np.maximum(
+            np.ceil((self.upper - self.lower) / self.cell_size).astype(int), 1
+        )
+
+        # Cells overlapped by the bounding box of each shape
+        first = self._cell_coordinates(self.centers - self.outer_radii[:, None])
+        last = self._cell_coordinates(self.centers + self.outer_radii[:, None])
+        spans = last - first + 1
+        N_cells_per_shape = np.prod(spans, axis=1)
+
+        # Every (shape, cell) pair at once, without looping over the shapes
+        shape_ids = np.repeat(np.arange(len(self.centers)), N_cells_per_shape)
+        local = np.arange(len(shape_ids)) - np.repeat(
+            np.cumsum(N_cells_per_shape) - N_cells_per_shape, N_cells_per_shape
+        )
+        columns = first[shape_ids, 0] + local % spans[shape_ids, 0]
+        rows = first[shape_ids, 1] + local // spans[shape_ids, 0]
+        cells = rows * self.shape[0] + columns
+
+        order = np.argsort(cells, kind="stable")
+        self.cell_shapes = shape_ids[order]
+        self.cell_starts = np.concatenate(
+            ([0], np.cumsum(np.bincount(cells, minlength=np.prod(self.shape))))
+        )
+
+    def _cell_coordinates(self, points):
+        """Returns the column and row of the cells holding given points."""
+
+        coordinates = np.floor((points - self.lower) / self.cell_size).astype(int)
+        return np.clip(coordinates, 0, self.shape - 1)
+
+    def count(self, points):
+        """Returns the number of shapes covering each one of the points.
+
+        Parameters
+        ----------
+        points: ~np.ndarray
+            An Nx2 matrix holding the coordinates of the points.
+
+        Returns
+        -------
+        counts: ~np.ndarray
+            Number of shapes covering each point.
+        """
+
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        inside_grid = np.all((points >= self.lower) & (points <= self.upper), axis=1)
+        (point_ids,) = np.nonzero(inside_grid)
+
+        # Candidates of each point are the shapes stored in its cell
+        columns, rows = self._cell_coordinates(points[point_ids]).T
+        cells = rows * self.shape[0] + columns
+        starts, stops = self.cell_starts[cells], self.cell_starts[cells + 1]
+        N_candidates = stops - starts
+
+        candidate_points = np.repeat(point_ids, N_candidates)
+        offsets = np.arange(len(candidate_points)) - np.repeat(
+            np.cumsum(N_candidates) - N_candidates, N_candidates
+        )
+        candidate_shapes = self.cell_shapes[np.repeat(starts, N_candidates) + offsets]
+
+        # A point is covered if its distance to the center lies in the annulus
+        deltas = points[candidate_points] - self.centers[candidate_shapes]
+        distances_squared = np.einsum("ij,ij->i", deltas, deltas)
+        is_covered = (distances_squared <= self.outer_radii[candidate_shapes] ** 2) & (
+            distances_squared >= self.inner_radii[candidate_shapes] ** 2
+        )
+        return np.bincount(candidate_points[is_covered], minlength=len(points))
+
+
+def olympic_rings(radius=150, thickness=None):
+    """Returns the index of the rings of the Olympic games logo.
+
+    The layout is the one of `generar_centros` and `dibujar_anillo` in
+    `compumaticas_0/olympic_games_logo`: a gap of a quarter of the radius
+    between rings and lines as thick as a tenth of the radius.
+
+    Parameters
+    ----------
+    radius: float
+        Radius of the rings.
+    thickness: float
+        Width of the line of the rings. If `None`, a tenth of the radius.
+
+    Returns
+    -------
+    index: ShapeIndex
+        The five annuli of the logo.
+    """
+
+    # Same layout as `centros_unitarios` in compumaticas_0/olympic_games_logo/
+    # geometria.py, scaled by the radius. The course folders are independent
+    # sets of scripts, each one run from its own directory and not installed
+    # as packages, so this one can not import it and keeps its own copy. Any
+    # change to the layout must be done in both places.
+    thickness = radius / 10 if thickness is None else thickness
+    d_x, d_y = 2 * radius + radius / 4, radius + radius / 4
+    centers = [(d_x * (i - 1), d_y / 2) for i in range(3)]
+    centers += [(d_x * (i - 3.5), -d_y / 2) for i in range(3, 5)]
+    return ShapeIndex(
+        centers, radius - thickness / 2, np.full(5, radius + thickness / 2)
+    )
+
+
+def star_discs(x, y, radii, cell_size=None):
+    """Returns the index of the stars of a night sky, drawn as filled discs.
+
+    Parameters
+    ----------
+    x: ~np.ndarray
+        Horizontal coordinate of the center of each star.
+    y: ~np.ndarray
+        Vertical coordinate of the center of each star.
+    radii: ~np.ndarray
+        Radius of each star.
+    cell_size: float
+        Side of the cells of the grid.
+
+    Returns
+    -------
+    index: ShapeIndex
+        The discs of the stars.
+    """
+
+    x, y, radii = np.broadcast_arrays(*np.atleast_1d(x, y, radii))
+    return ShapeIndex(np.column_stack((x, y)), 0, radii, cell_size)
+
+
+@dataclass
+class SceneAreaResult:
+    """Outcome of the Monte Carlo estimation of the area of a scene.
+
+    Parameters
+    ----------
+    covered_area: float
+        Area covered by at least one shape.
+    covered_std_error: float
+        Standard error of the covered area.
+    overlap_area: float
+        Area covered by two or more shapes.
+    overlap_std_error: float
+        Standard error of the overlap area.
+    overlap_fraction: float
+        Fraction of the covered area which is covered by two or more shapes.
+    overlap_fraction_std_error: float
+        Standard error of the overlap fraction, by the delta method.
+    N_points: int
+        Number of points used for the estimation.
+    elapsed_time: float
+        Wall time, in seconds, spent in the computation.
+    """
+
+    covered_area: float
+    covered_std_error: float
+    overlap_area: float
+    overlap_std_error: float
+    overlap_fraction: float
+    overlap_fraction_std_error: float
+    N_points: int
+    elapsed_time: float
+
+
+def _coverage_streams(streams, index, lower, upper, chunk_size):
+    """Computes the running statistics of the covered and the overlap areas for
+    a collection of streams.
+
+    Parameters
+    ----------
+    streams: list
+        A list of (seed_sequence, N_samples) tuples, one per random stream.
+    index: ShapeIndex
+        The shapes of the scene.
+    lower: ~np.ndarray
+        Lower left corner of the sampled rectangle.
+    upper: ~np.ndarray
+        Upper right corner of the sampled rectangle.
+    chunk_size: int
+        Maximum number of points drawn and tested at once.
+
+    Returns
+    -------
+    stream_results: list
+        Number of samples, mean vector and matrix of co-moments of the covered
+        and the overlap indicators for each one of the streams.
+    """
+
+    sides, rectangle_area = upper - lower, np.prod(upper - lower)
+
+    stream_results = []
+    for seed_sequence, N_samples in streams:
+        rng = np.random.default_rng(seed_sequence)
+        moments = _empty_moments(2)
+
+        for first_sample in range(0, N_samples, chunk_size):
+            N_block = min(chunk_size, N_samples - first_sample)
+            points = lower + sides * rng.random((N_block, 2))
+            counts = index.count(points)
+
+            # Both areas are estimated from the very same points
+            samples = rectangle_area * np.column_stack((counts >= 1, counts >= 2))
+            block_mean = samples.mean(axis=0)
+            deviations = samples - block_mean
+            moments = _merge_moments(
+                moments, (N_block, block_mean, deviations.T @ deviations)
+            )
+
+        stream_results.append(moments)
+
+    return stream_results
+
+
+def montecarlo_scene_area(
+    index, limits=None, N_points=1e6, chunk_size=None, seed=None, workers=None
+):
+    """Estimates the area covered by the shapes of a scene and the fraction of
+    it where they overlap.
+
+    Parameters
+    ----------
+    index: ShapeIndex
+        The shapes of the scene.
+    limits: ~np.ndarray
+        A (2, 2) matrix with the horizontal and vertical limits of the sampled
+        rectangle. If `None`, the bounding box of the shapes is used.
+    N_points: int
+        Number of points: the higher this number, the greater the accuracy.
+    chunk_size: int
+        Maximum number of points drawn and tested at once. If `None`, the
+        points of each random stream are drawn at once.
+    seed: int or ~np.random.SeedSequence
+        Seed for the random streams. If `None`, fresh entropy is used.
+    workers: int
+        Number of processes sharing the work. If `None`, a single process is
+        used.
+
+    Returns
+    -------
+    result: SceneAreaResult
+        The areas, the overlap fraction and their standard errors.
+    """
+
+    start_time = time.perf_counter()
+    if limits is None:
+        lower, upper = index.lower, index.upper
+    else:
+        lower, upper = np.asarray(limits, dtype=float).reshape(2, 2).T
+    if not np.all(lower < upper):
+        raise ValueError(f"Provided {limits = } are not valid ones.")
+
+    N_points, chunk_size, workers = _check_positive(
+        N_points=N_points,
+        chunk_size=STREAM_SIZE if chunk_size is None else chunk_size,
+        workers=1 if workers is None else workers,
+    )
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = _make_streams(seed, N_points)
+
+    kernel_args = (index, lower, upper, chunk_size)
+    if workers == 1:
+        stream_results = _map_streams(_coverage_streams, streams, kernel_args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            stream_results = _map_streams(
+                _coverage_streams, streams, kernel_args, executor, workers
+            )
+
+    moments = _empty_moments(2)
+    for stream_moments in stream_results:
+        moments = _merge_moments(moments, stream_moments)
+    N, (covered_area, overlap_area), M2 = moments
+    covariance = M2 / (N - 1) / N if N > 1 else np.full((2, 2), np.inf)
+
+    # The overlap fraction is a ratio of means, whose variance follows from
+    # the first order expansion of the ratio (a.k.a. delta method)
+    if covered_area > 0:
+        fraction = overlap_area / covered_area
+        fraction_variance = (
+            covariance[1, 1]
+            - 2 * fraction * covariance[0, 1]
+            + fraction**2 * covariance[0, 0]
+        ) / covered_area**2
+    else:
+        fraction, fraction_variance = np.nan, np.nan
+
+    return SceneAreaResult(
+        covered_area=float(covered_area),
+        covered_std_error=float(np.sqrt(covariance[0, 0])),
+        overlap_area=float(overlap_area),
+        overlap_std_error=float(np.sqrt(covariance[1, 1])),
+        overlap_fraction=float(fraction),
+        overlap_fraction_std_error=float(np.sqrt(max(fraction_variance, 0))),
+        N_points=N,
+        elapsed_time=time.perf_counter() - start_time,
+    )
+
+
+def _print_result(name, result):
+    """Prints the areas of a scene together with their standard errors."""
+
+    print(
+        f"{name}: covered {result.covered_area:.1f} ± {result.covered_std_error:.1f}"
+        f", overlap {result.overlap_area:.1f} ± {result.overlap_std_error:.1f}"
+        f" ({100 * result.overlap_fraction:.2f} ± "
+        f"{100 * result.overlap_fraction_std_error:.2f} %)"
+        f" with {result.N_points} points in {result.elapsed_time:.2f} s"
+    )
+
+
+def main():
+    """Entry point of the script."""
+
+    # Each ring covers 2 pi R g, so the covered area plus the overlap area
+    # must be close to five times that value
+    result = montecarlo_scene_area(olympic_rings(150), N_points=1e6, seed=0)
+    _print_result("Olympic rings", result)
+    print(f"Sum of the five annuli: {5 * 2 * np.pi * 150 * 15:.1f}")
+
+    # A dense night sky, with stars as in `dibujar_N_estrellas`
+    rng = np.random.default_rng(0)
+    x, y = (rng.random((2, 100_000)) - 0.5) * [[3840], [2160]]
+    radii = rng.random(100_000) * 5
+    result = montecarlo_scene_area(
+        star_discs(x, y, radii), [(-1920, 1920), (-1080, 1080)], N_points=1e7, seed=0
+    )
+    _print_result("Night sky", result)
+
+
+if __name__ == "__main__":
+    main()
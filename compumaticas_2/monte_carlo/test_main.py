@@ -0,0 +1,127 @@
+"""
+Regression tests for the Monte Carlo integration engine.
+
+Run them from this directory with `python -m pytest`.
+"""
+
+from math import erf, pi, sqrt
+
+import numpy as np
+import pytest
+
+from cache import ResultCache
+from main import (
+    f_at_x,
+    montecarlo_adaptive,
+    montecarlo_integral,
+    montecarlo_integral_batch,
+)
+
+
+def gaussian(x):
+    """Gaussian bell whose maximum lies at the center of the domain."""
+
+    return np.exp(-np.sum(x**2, axis=1))
+
+
+@pytest.mark.parametrize("method", ["hit-or-miss", "sample-mean"])
+def test_same_seed_gives_same_result_for_any_number_of_workers(method):
+    results = [
+        montecarlo_integral(
+            f_at_x, N_points=3e6, seed=5, workers=workers, method=method
+        )
+        for workers in (1, 2, 3)
+    ]
+    assert results[0] == results[1] == results[2]
+
+
+def test_chunked_and_unchunked_hit_or_miss_are_equal():
+    unchunked = montecarlo_integral(f_at_x, N_points=3e6, seed=5, full_output=True)
+    chunked = montecarlo_integral(
+        f_at_x, N_points=3e6, seed=5, chunk_size=12345, full_output=True
+    )
+    assert (chunked.I_val, chunked.std_error) == (
+        unchunked.I_val,
+        unchunked.std_error,
+    )
+
+
+def test_extended_cached_hit_or_miss_equals_a_direct_run():
+    cache = ResultCache()
+    montecarlo_integral(f_at_x, N_points=3e5, seed=7, cache=cache)
+    extended = montecarlo_integral(
+        f_at_x, N_points=1e6, seed=7, cache=cache, full_output=True
+    )
+    direct = montecarlo_integral(f_at_x, N_points=1e6, seed=7, full_output=True)
+    assert (extended.I_val, extended.std_error) == (direct.I_val, direct.std_error)
+
+
+def test_hit_or_miss_encloses_interior_maximum_in_several_dimensions():
+    result = montecarlo_integral(gaussian, [[-1, 1]] * 5, seed=1, full_output=True)
+    exact = (sqrt(pi) * erf(1)) ** 5
+    assert result.std_error > 0
+    assert abs(result.I_val - exact) < 4 * result.std_error
+
+
+def test_hit_or_miss_warns_when_function_escapes_the_box():
+    def spike(x):
+        return np.where(np.all(np.abs(x - 0.7) < 1e-3, axis=1), 1e6, 0.0)
+
+    with pytest.warns(RuntimeWarning, match="exceeds the rectangle"):
+        montecarlo_integral(spike, [[0, 1]] * 2, N_points=1e6, seed=1)
+
+
+def test_hit_or_miss_encloses_interior_maximum_in_one_dimension():
+    result = montecarlo_integral(
+        lambda x: np.sqrt(1 - x**2) * x**2, seed=1, full_output=True
+    )
+    assert result.std_error > 0
+    assert abs(result.I_val - pi / 16) < 4 * result.std_error
+
+
+def test_adaptive_draws_min_batches_before_trusting_a_zero_variance():
+    def spike(x):
+        return np.where(np.abs(x - 0.7) < 1e-5, 5e4, 0.0)
+
+    result = montecarlo_adaptive(
+        spike,
+        method="sample-mean",
+        rtol=1e-2,
+        batch_size=1000,
+        min_batches=50,
+        max_points=1e5,
+        seed=1,
+    )
+    assert not result.converged
+    assert result.N_points == 100_000
+
+
+def test_adaptive_converges_for_constant_integrands():
+    result = montecarlo_adaptive(
+        lambda x: np.full_like(x, 2.0),
+        method="sample-mean",
+        batch_size=1000,
+        min_batches=4,
+        seed=1,
+    )
+    assert result.converged
+    assert result.I_val == 2.0
+    assert result.N_points == 4000
+
+
+@pytest.mark.parametrize("dense_output", [1, np.True_])
+def test_dense_output_accepts_truthy_values(dense_output):
+    I_val, below_points, above_points = montecarlo_integral(
+        lambda x: x, N_points=1000, dense_output=dense_output, seed=1
+    )
+    assert len(below_points) + len(above_points) == 1000
+
+
+def test_batch_rejects_limits_and_thetas_of_different_lengths():
+    with pytest.raises(ValueError, match="different lengths"):
+        montecarlo_integral_batch(
+            lambda x, theta: x**theta,
+            limits=[(0, 1), (0, 2)],
+            thetas=[1, 2, 3],
+            N_points=100,
+        )